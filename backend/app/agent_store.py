@@ -0,0 +1,123 @@
+"""Relational storage for agent records.
+
+Agents are only ever looked up by ID or listed, never searched by similarity,
+so they live in a SQL table keyed on their ID instead of a ChromaDB
+collection. ChromaDB is left to the chat logs and documents it searches.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    BigInteger, Boolean, Column, MetaData, String, Table, Text,
+    create_engine, delete, event, func, select, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+agents_table = Table(
+    "agents",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("name", Text, nullable=False),
+    Column("description", Text, nullable=False),
+    Column("prompt", Text, nullable=False),
+    Column("tools", Text, nullable=False),  # comma-joined tool names
+    Column("hitl_enabled", Boolean, nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("created_at", BigInteger, nullable=False),  # microseconds since the epoch
+    Column("updated_at", BigInteger, nullable=False),
+    Column("context", Text, nullable=False)  # JSON
+)
+
+# Dialects with INSERT ... ON CONFLICT, which lets upsert run as one statement
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+class AgentStore:
+    def __init__(self, url: str):
+        """Connect to the database and create the agents table if needed.
+
+        Args:
+            url (str): SQLAlchemy database URL, e.g. "sqlite:///./ihubpt.db".
+        """
+        is_sqlite = url.startswith("sqlite")
+        self.engine = create_engine(
+            url,
+            # API requests reach the store from the thread pool
+            connect_args={"check_same_thread": False} if is_sqlite else {}
+        )
+        if is_sqlite:
+            event.listen(self.engine, "connect", _configure_sqlite)
+        metadata.create_all(self.engine)
+        self._insert = _UPSERT_DIALECTS.get(self.engine.dialect.name)
+        logger.info("Agent store ready at %s", self.engine.url.render_as_string(hide_password=True))
+
+    def upsert(self, records: List[Dict[str, Any]]) -> None:
+        """Create or replace agent records in one transaction.
+
+        Args:
+            records (List[Dict[str, Any]]): Full agent records, one per agent ID.
+        """
+        if not records:
+            return
+        with self.engine.begin() as conn:
+            if self._insert is None:
+                # Portable fallback for databases without ON CONFLICT
+                conn.execute(delete(agents_table).where(agents_table.c.id.in_([r["id"] for r in records])))
+                conn.execute(agents_table.insert(), records)
+                return
+            stmt = self._insert(agents_table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[agents_table.c.id],
+                set_={column.name: stmt.excluded[column.name] for column in agents_table.c if column.name != "id"}
+            )
+            conn.execute(stmt, records)
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Get an agent record by ID, or None if there is none."""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(agents_table).where(agents_table.c.id == agent_id)).mappings().first()
+        return dict(row) if row else None
+
+    def list(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get agent records in creation order, all of them unless limit is given."""
+        query = select(agents_table).order_by(agents_table.c.created_at, agents_table.c.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [dict(row) for row in conn.execute(query).mappings()]
+
+    def update(self, agent_id: str, values: Dict[str, Any]) -> bool:
+        """Set some fields of an agent record.
+
+        Returns:
+            bool: False if no agent has this ID.
+        """
+        with self.engine.begin() as conn:
+            result = conn.execute(update(agents_table).where(agents_table.c.id == agent_id).values(**values))
+        return result.rowcount > 0
+
+    def delete(self, agent_id: str) -> bool:
+        """Delete an agent record.
+
+        Returns:
+            bool: False if no agent has this ID.
+        """
+        with self.engine.begin() as conn:
+            result = conn.execute(delete(agents_table).where(agents_table.c.id == agent_id))
+        return result.rowcount > 0
+
+    def count(self) -> int:
+        """Get the number of stored agents."""
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(agents_table)).scalar_one()
+
+def _configure_sqlite(dbapi_connection: Any, connection_record: Any) -> None:
+    """Let reads run alongside a write, and sync to disk at checkpoints rather than every commit."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
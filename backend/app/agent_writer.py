@@ -0,0 +1,86 @@
+"""Coalesces concurrent agent writes into shared upserts.
+
+Creating an agent writes one record to the agent store, and each write is
+its own transaction with its own commit. The API runs these writes
+on its thread pool, so the writer sends the first one straight away and
+collects everything that arrives meanwhile into the next upsert. Callers
+still return only once their own write is stored, so reads after a write
+always see it.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.agent_store import AgentStore
+
+logger = logging.getLogger(__name__)
+
+class _PendingWrite:
+    def __init__(self, agent_id: str, record: Dict[str, Any]):
+        """Initialize a write waiting to be flushed."""
+        self.agent_id = agent_id
+        self.record = record
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+class AgentWriter:
+    def __init__(self, store: AgentStore, batch_size: int):
+        """Initialize an idle writer.
+
+        Args:
+            store (AgentStore): The store holding agents.
+            batch_size (int): Maximum number of agents per upsert.
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self._pending: List[_PendingWrite] = []
+        self._lock = threading.Lock()
+        self._flushing = False
+
+    def write(self, agent_id: str, record: Dict[str, Any]) -> None:
+        """Create or replace an agent record, sharing the upsert with concurrent callers.
+
+        Returns once the record is stored.
+
+        Args:
+            agent_id (str): The agent's ID.
+            record (Dict[str, Any]): The agent's stored fields.
+
+        Raises:
+            Exception: Whatever the store raised for the upsert that held this write.
+        """
+        pending = _PendingWrite(agent_id, record)
+        with self._lock:
+            self._pending.append(pending)
+            flush = not self._flushing
+            self._flushing = True
+
+        if flush:
+            self._flush()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def _flush(self) -> None:
+        """Upsert pending writes until no more arrive."""
+        while True:
+            with self._lock:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                if not batch:
+                    self._flushing = False
+                    return
+
+            # An upsert cannot touch the same row twice; the last write for an agent wins
+            latest = {pending.agent_id: pending.record for pending in batch}
+            if len(batch) > 1:
+                logger.info("Writing %s agents from %s requests together", len(latest), len(batch))
+            try:
+                self.store.upsert(list(latest.values()))
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
@@ -0,0 +1,88 @@
+"""Background writer for chat logs.
+
+Chat logs are only read back for auditing, yet saving one is a ChromaDB
+insert and index update (the logs themselves store a fixed vector rather
+than an embedding). Replies queue their logs here instead of waiting on
+that insert; a background task gathers the queued logs for a short window
+and writes them together, one ChromaDB call per batch.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ChatLogWriter:
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], None], queue_size: int,
+                 batch_size: int, flush_interval: float):
+        """Initialize an idle writer.
+
+        Args:
+            write (Callable[[List[Dict[str, Any]]], None]): Blocking call that stores a batch of chat logs.
+            queue_size (int): Maximum number of logs waiting to be written.
+            batch_size (int): Maximum number of logs per write.
+            flush_interval (float): Seconds to gather logs after the first one arrives.
+        """
+        self.write = write
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background task on the running event loop if it is not running."""
+        if self._task and not self._task.done():
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        """Write the logs still queued and stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        while not self._queue.empty():
+            await self._write_batch(self._take(self.batch_size))
+
+    def submit(self, chat_log: Dict[str, Any]) -> None:
+        """Queue a chat log to be written. Drops it if the queue is full.
+
+        Args:
+            chat_log (Dict[str, Any]): The chat log's metadata.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(chat_log)
+        except asyncio.QueueFull:
+            logger.warning("Chat log queue is full; dropping log for agent %s", chat_log.get("agent_id"))
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        """Remove up to limit logs from the queue without waiting."""
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch of logs, logging rather than raising on failure."""
+        try:
+            await asyncio.to_thread(self.write, batch)
+        except Exception as e:
+            logger.error("Failed to save %s chat logs: %s", len(batch), e)
+
+    async def _drain(self) -> None:
+        """Write queued logs in batches until cancelled."""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Give the logs of concurrent replies a moment to join this write
+                await asyncio.sleep(self.flush_interval)
+            finally:
+                # Logs already taken from the queue are written even when stopping
+                batch.extend(self._take(self.batch_size - 1))
+                await self._write_batch(batch)
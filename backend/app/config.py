@@ -7,9 +7,14 @@ All settings can be overridden using environment variables or a .env file.
 import os
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
+# The backend directory; default file paths are anchored here rather than to the
+# working directory, like the ChromaDB directory under app/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Settings(BaseSettings):
     """Application settings configuration.
     
@@ -17,19 +22,39 @@ class Settings(BaseSettings):
     overridden using environment variables or a .env file.
     
     Attributes:
-        DATABASE_URL (str): SQLite database connection URL.
+        DATABASE_URL (str): SQLAlchemy URL of the agent store database (SQLite or PostgreSQL).
+            Defaults to ihubpt.db in the backend directory.
         API_V1_PREFIX (str): URL prefix for API v1 endpoints.
         SECRET_KEY (str): Secret key for JWT token generation.
         ACCESS_TOKEN_EXPIRE_MINUTES (int): JWT token expiration time in minutes.
         DEFAULT_AGENT_TIMEOUT (int): Default timeout for agent operations in seconds.
+        CHAT_HISTORY_LIMIT (int): Most recent chat messages kept in an agent's stored context.
+        AGENT_WRITE_BATCH_SIZE (int): Maximum number of agents written to the agent store per upsert.
         HITL_ENABLED (bool): Whether human-in-the-loop functionality is enabled.
         HITL_TIMEOUT (int): Timeout for HITL operations in seconds.
         OPENAI_MODEL (str): OpenAI model to use for chat completions.
         OPENAI_TEMPERATURE (float): Temperature setting for model responses.
         OPENAI_MAX_TOKENS (Optional[int]): Maximum tokens per response.
+        SEMANTIC_CACHE_ENABLED (bool): Whether chat responses are served from the semantic cache.
+        SEMANTIC_CACHE_THRESHOLD (float): Minimum cosine similarity for a cache hit.
+        SEMANTIC_CACHE_TTL (int): Lifetime of cached chat responses in seconds.
+        AGENT_CACHE_TTL (Optional[int]): How long a loaded agent is served from memory in seconds,
+            or None to keep it until it changes. Every change made by this process is
+            written through, so a TTL only matters if other processes edit agents.
+        AGENT_CACHE_SIZE (int): Maximum number of agents kept in the in-memory cache.
+        WORKFLOW_CACHE_SIZE (int): Maximum number of built agent workflows kept for reuse.
+        AGENT_START_WORKERS (int): Number of background workers that start queued agents.
+        QUERY_CACHE_SIZE (int): Maximum number of vector search results kept in memory.
+        QUERY_CACHE_TTL (int): Lifetime of cached vector search results in seconds.
+        DOCUMENT_BATCH_SIZE (int): Documents written to the vector store per ChromaDB call.
+        CHAT_LOG_QUEUE_SIZE (int): Chat logs waiting to be written before new ones are dropped.
+        CHAT_LOG_BATCH_SIZE (int): Maximum number of chat logs written per ChromaDB call.
+        CHAT_LOG_FLUSH_MS (int): How long the chat log writer gathers logs before writing them.
+        IO_POOL_WORKERS (int): Threads available to API endpoints for blocking storage calls.
+        LOG_LEVEL (str): Level of the application's root logger.
     """
     # Database settings
-    DATABASE_URL: str = "sqlite:///./ihubpt.db"
+    DATABASE_URL: str = f"sqlite:///{os.path.join(BACKEND_DIR, 'ihubpt.db')}"
     
     # API settings
     API_V1_PREFIX: str = "/api/v1"
@@ -40,6 +65,8 @@ class Settings(BaseSettings):
     
     # Agent settings
     DEFAULT_AGENT_TIMEOUT: int = 300  # 5 minutes
+    CHAT_HISTORY_LIMIT: int = 40  # 20 user/assistant turns
+    AGENT_WRITE_BATCH_SIZE: int = 200
     
     # HITL settings
     HITL_ENABLED: bool = True
@@ -50,9 +77,43 @@ class Settings(BaseSettings):
     OPENAI_TEMPERATURE: float = 0.7  # Temperature for model responses
     OPENAI_MAX_TOKENS: Optional[int] = None  # Max tokens per response, None for no limit
     
-    class Config:
-        """Pydantic configuration for environment variable loading."""
-        env_file = ".env"
+    # Semantic cache settings
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Cosine similarity required to reuse a response
+    SEMANTIC_CACHE_TTL: int = 3600  # 1 hour
+    
+    # Agent lookup cache settings
+    AGENT_CACHE_TTL: Optional[int] = None  # seconds
+    AGENT_CACHE_SIZE: int = 1024
+    WORKFLOW_CACHE_SIZE: int = 128
+    
+    # Agent dispatcher settings
+    AGENT_START_WORKERS: int = 4
+    
+    # Vector search result cache settings
+    QUERY_CACHE_SIZE: int = 2000
+    QUERY_CACHE_TTL: int = 300  # 5 minutes
+    
+    # Vector store write settings
+    DOCUMENT_BATCH_SIZE: int = 200  # 100-250 embeds and inserts fastest
+    CHAT_LOG_QUEUE_SIZE: int = 10000
+    CHAT_LOG_BATCH_SIZE: int = 100
+    CHAT_LOG_FLUSH_MS: int = 200
+    
+    # Thread pool for blocking calls made by the API endpoints
+    IO_POOL_WORKERS: int = 32
+    
+    # Logging settings
+    LOG_LEVEL: str = "INFO"
+    
+    # Settings are read once and never mutated at runtime
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
 
-# Global settings instance
-settings = Settings() 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the application settings, loading them on first use.
+    
+    Returns:
+        Settings: The shared settings instance.
+    """
+    return Settings() 
\ No newline at end of file
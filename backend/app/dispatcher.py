@@ -0,0 +1,78 @@
+"""Background dispatcher for agent workflow starts.
+
+The API queues agent starts here and returns immediately; a fixed pool of
+worker tasks drains the queue, so at most AGENT_START_WORKERS starts run at
+once no matter how many requests arrive.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Set
+
+from app.config import get_settings
+from app.engine import agent_engine
+from app.models import Agent
+
+logger = logging.getLogger(__name__)
+
+class AgentDispatcher:
+    def __init__(self, workers: int):
+        """Initialize the dispatcher.
+
+        Args:
+            workers (int): Number of worker tasks draining the queue.
+        """
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop if they are not running."""
+        if self._tasks and not any(task.done() for task in self._tasks):
+            return
+
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("Agent dispatcher started with %s workers", self.workers)
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks. Queued starts that have not run are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+
+    def is_pending(self, agent_id: str) -> bool:
+        """Check whether an agent is queued to start but has not started yet."""
+        return str(agent_id) in self._pending
+
+    async def submit_start(self, agent: Agent) -> None:
+        """Queue an agent to be started by a worker.
+
+        Args:
+            agent (Agent): The agent to start.
+        """
+        self.start()
+        self._pending.add(str(agent.id))
+        await self._queue.put(agent)
+
+    async def _worker(self, index: int) -> None:
+        """Start queued agents one at a time until cancelled."""
+        while True:
+            agent = await self._queue.get()
+            try:
+                await agent_engine.astart_agent(agent)
+            except ValueError as e:
+                # start_agent has already logged the error and marked the agent FAILED
+                logger.warning("Queued start of agent %s failed: %s", agent.id, e)
+            except Exception:
+                logger.exception("Worker %s failed to start agent %s", index, agent.id)
+            finally:
+                self._pending.discard(str(agent.id))
+                self._queue.task_done()
+
+# Create a global dispatcher instance
+agent_dispatcher = AgentDispatcher(workers=get_settings().AGENT_START_WORKERS)
@@ -0,0 +1,77 @@
+"""Coalesces concurrent document uploads into shared vector store writes.
+
+Callers that add a few documents per request would otherwise each pay for
+their own ChromaDB transaction and embedding call. The batcher writes the
+first request straight away and collects everything that arrives while that
+write is running into the next one, so a lone request never waits and a
+burst of small requests becomes a handful of full batches.
+"""
+
+import asyncio
+import logging
+from typing import List, Set, Tuple
+
+from langchain.schema import Document
+
+from app.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+class DocumentBatcher:
+    def __init__(self):
+        """Initialize an idle batcher."""
+        self._pending: List[Tuple[List[Document], asyncio.Future]] = []
+        self._flushing = False
+        # The loop only keeps weak references to tasks, so running flushes are held here
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def add(self, documents: List[Document]) -> None:
+        """Add documents to the vector store, sharing the write with concurrent callers.
+
+        Returns once the documents are stored.
+
+        Args:
+            documents (List[Document]): The documents to add.
+
+        Raises:
+            Exception: Whatever the vector store raised for the write that held
+                these documents.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((documents, future))
+        if not self._flushing:
+            self._flushing = True
+            task = asyncio.create_task(self._flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        await future
+
+    async def _flush(self) -> None:
+        """Write pending documents until no more arrive."""
+        try:
+            while self._pending:
+                waiting, self._pending = self._pending, []
+                documents = [doc for docs, _ in waiting for doc in docs]
+                if len(waiting) > 1:
+                    logger.info("Writing %s documents from %s requests together", len(documents), len(waiting))
+                try:
+                    # add_documents splits the write into DOCUMENT_BATCH_SIZE chunks
+                    await asyncio.to_thread(vector_store.add_documents, documents)
+                except Exception as e:
+                    for _, future in waiting:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for _, future in waiting:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            self._flushing = False
+
+    async def wait_for_flushes(self) -> None:
+        """Wait for running writes to finish, e.g. before shutting down."""
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+# Create a global document batcher instance
+document_batcher = DocumentBatcher()
@@ -1,18 +1,281 @@
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import build_http
+from googleapiclient.model import JsonModel
+from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
 import os
 import io
-import pickle
+import asyncio
+import functools
+import threading
+import zlib
+import orjson
 from pathlib import Path
+from datetime import datetime, timedelta, timezone
 import logging
-from typing import Optional, Tuple, List, Dict, Any
-import tempfile
+from typing import Optional, Tuple, List, Dict, Any, BinaryIO
+
+from app.google_token import load_token, save_token, token_exists, token_path
 
 logger = logging.getLogger(__name__)
 
+# Uploads below this size use a single multipart request instead of a resumable session
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Large enough that typical documents download in a single request
+DOWNLOAD_CHUNK_SIZE = 10 * 1024 * 1024
+# Fast zlib level; text still compresses well and cache hits stay cheap
+CACHE_COMPRESSION_LEVEL = 3
+# Size cap of the local file content cache; least recently used entries are evicted first
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Largest pageSize files.list accepts
+MAX_PAGE_SIZE = 1000
+
+# Response field projections
+_LIST_FIELDS = "nextPageToken, files(id, name, mimeType, createdTime)"
+_CREATE_FIELDS = "id, name, mimeType, createdTime, modifiedTime, size"
+
+# File field presets for search_files; request only what the caller uses
+FIELDS_MIN = "files(id)"
+FIELDS_LIST = "files(id, name, mimeType)"
+FIELDS_FULL = "files(id, name, mimeType, createdTime, modifiedTime, size)"
+
+# Credentials are refreshed this long before they expire
+REFRESH_MARGIN = timedelta(seconds=120)
+MIN_REFRESH_INTERVAL = 60
+
+_NAME_QUERY = "name = '{}'".format
+
+@functools.lru_cache(maxsize=1024)
+def _name_query(name: str) -> str:
+    """
+    Build a Drive query matching a file name exactly.
+    
+    Backslashes and single quotes are escaped so names like "it's.txt" produce a
+    valid query instead of a Drive API error.
+    
+    Args:
+        name (str): The exact file name
+        
+    Returns:
+        str: The Drive search query
+    """
+    return _NAME_QUERY(name.replace("\\", "\\\\").replace("'", "\\'"))
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that parses response bodies with orjson instead of the stdlib json."""
+    
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+def _load_credentials(credentials_path: str) -> Credentials:
+    """
+    Load OAuth credentials from the token file next to the credentials file.
+    
+    Expired credentials are refreshed and missing ones trigger the local OAuth
+    flow; either way the resulting token is written back to disk.
+    
+    Args:
+        credentials_path (str): Path to the credentials JSON file
+        
+    Returns:
+        Credentials: Valid OAuth credentials
+    """
+    # Load existing token if it exists
+    creds = load_token(credentials_path)
+    
+    # If no valid credentials available, let user log in
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                credentials_path, DriveService.SCOPES)
+            creds = flow.run_local_server(port=0)
+        
+        # Save the credentials for the next run
+        save_token(credentials_path, creds)
+    
+    return creds
+
+@functools.lru_cache(maxsize=None)
+def _get_cached_credentials(credentials_path: str) -> Credentials:
+    """
+    Load the OAuth credentials once per credentials file and share them.
+    
+    Args:
+        credentials_path (str): Path to the credentials JSON file
+        
+    Returns:
+        Credentials: The shared credentials object
+    """
+    return _load_credentials(credentials_path)
+
+def _needs_refresh(creds: Credentials) -> bool:
+    """Check whether credentials expire within REFRESH_MARGIN."""
+    if creds.expiry is None:
+        return False
+    # google-auth stores expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - REFRESH_MARGIN <= now
+
+def _refresh_and_save(credentials_path: str, creds: Credentials) -> None:
+    """Refresh credentials with a blocking token request and persist the result."""
+    creds.refresh(Request())
+    save_token(credentials_path, creds)
+    logger.info("Drive credentials refreshed")
+
+_refresh_locks: Dict[str, asyncio.Lock] = {}
+
+async def refresh_credentials(credentials_path: str) -> None:
+    """
+    Refresh the shared credentials off the event loop if they are about to expire.
+    
+    Concurrent callers share a single in-flight refresh, and the blocking token
+    request runs in a worker thread so other requests keep being served.
+    
+    Args:
+        credentials_path (str): Path to the credentials JSON file
+    """
+    creds = await asyncio.to_thread(_get_cached_credentials, credentials_path)
+    if not _needs_refresh(creds):
+        return
+    
+    lock = _refresh_locks.setdefault(credentials_path, asyncio.Lock())
+    async with lock:
+        # Another caller may have refreshed while we waited for the lock
+        if _needs_refresh(creds):
+            await asyncio.to_thread(_refresh_and_save, credentials_path, creds)
+
+async def _keep_credentials_fresh(credentials_path: str) -> None:
+    """Background task refreshing the shared credentials shortly before they expire."""
+    while True:
+        try:
+            await refresh_credentials(credentials_path)
+            creds = _get_cached_credentials(credentials_path)
+            if creds.expiry is None:
+                return
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            delay = (creds.expiry - REFRESH_MARGIN - now).total_seconds()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Background Drive credential refresh failed: %s", e)
+            delay = 0
+        await asyncio.sleep(max(delay, MIN_REFRESH_INTERVAL))
+
+@functools.lru_cache(maxsize=None)
+def _get_cached_service(credentials_path: str):
+    """
+    Build the authorized Drive service once per credentials file.
+    
+    Uses the discovery document bundled with googleapiclient so building the
+    service never goes to the network. All requests made through the service
+    share one keep-alive HTTP connection pool, so the TLS handshake is paid
+    once rather than per call. Failures are not cached.
+    
+    Args:
+        credentials_path (str): Path to the credentials JSON file
+        
+    Returns:
+        object: Drive v3 service object
+    """
+    creds = _get_cached_credentials(credentials_path)
+    http = AuthorizedHttp(creds, http=build_http())
+    return build('drive', 'v3', http=http, model=_OrjsonModel(), static_discovery=True)
+
+def _list_files_paged(service, max_results: int, **params) -> List[Dict[str, Any]]:
+    """
+    Collect up to max_results files from files.list, following nextPageToken.
+    
+    Each page asks for all remaining results (capped at MAX_PAGE_SIZE), so the
+    number of round trips stays as small as Drive allows.
+    
+    Args:
+        service: Drive v3 service object
+        max_results (int): Maximum number of files to return
+        **params: Additional files.list parameters; fields must include nextPageToken
+        
+    Returns:
+        List[Dict[str, Any]]: The collected file metadata
+    """
+    files = []
+    while len(files) < max_results:
+        results = service.files().list(
+            pageSize=min(max_results - len(files), MAX_PAGE_SIZE),
+            **params
+        ).execute()
+        files.extend(results.get('files', []))
+        
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+        params['pageToken'] = page_token
+    return files[:max_results]
+
+_thread_local = threading.local()
+
+def _thread_http(credentials: Credentials) -> AuthorizedHttp:
+    """
+    Get the calling thread's authorized HTTP client, creating it on first use.
+    
+    Args:
+        credentials (Credentials): Credentials to authorize requests with
+        
+    Returns:
+        AuthorizedHttp: HTTP client owned by the current thread
+    """
+    http = getattr(_thread_local, 'http', None)
+    if http is None or http.credentials is not credentials:
+        http = AuthorizedHttp(credentials, http=build_http())
+        _thread_local.http = http
+    return http
+
+_refresh_task: Optional[asyncio.Task] = None
+
+async def warmup(credentials_path: Optional[str] = None) -> bool:
+    """
+    Pre-build the shared Drive service so the first request skips the setup cost.
+    
+    Intended to run from the application's startup hook. It only warms up when a
+    token already exists on disk and never starts the interactive OAuth flow.
+    Once warmed up, a background task keeps the credentials refreshed ahead of
+    expiry so requests never wait on a token refresh.
+    
+    Args:
+        credentials_path (Optional[str]): Path to the credentials JSON file.
+            Defaults to backend/credentials/google_credentials.json.
+            
+    Returns:
+        bool: True if the service was built, False otherwise
+    """
+    if credentials_path is None:
+        credentials_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'credentials', 'google_credentials.json')
+    if not token_exists(credentials_path):
+        logger.info("No Drive token found, skipping Drive service warmup")
+        return False
+    
+    try:
+        await asyncio.to_thread(_get_cached_service, credentials_path)
+        logger.info("Drive service warmed up")
+    except Exception as e:
+        logger.warning("Drive service warmup failed: %s", e)
+        return False
+    
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_keep_credentials_fresh(credentials_path))
+    return True
+
 class DriveService:
     """Service class for Google Drive operations."""
     
@@ -27,6 +290,26 @@ class DriveService:
         'https://www.googleapis.com/auth/drive'
     ]
     
+    _instances: Dict[str, 'DriveService'] = {}
+    _instances_lock = threading.Lock()
+    
+    @classmethod
+    def get_instance(cls, credentials_path: str) -> 'DriveService':
+        """
+        Get the shared DriveService for a credentials file, creating it on first use.
+        
+        Args:
+            credentials_path (str): Path to the credentials JSON file
+            
+        Returns:
+            DriveService: The instance shared by every caller using this path
+        """
+        instance = cls._instances.get(credentials_path)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.setdefault(credentials_path, cls(credentials_path))
+        return instance
+    
     def __init__(self, credentials_path: str):
         """
         Initialize the Drive service with credentials.
@@ -35,44 +318,26 @@ class DriveService:
             credentials_path (str): Path to the credentials JSON file
         """
         self.credentials_path = credentials_path
-        self.token_path = os.path.join(os.path.dirname(credentials_path), 'token.pickle')
+        self.token_path = token_path(credentials_path)
         self.service = None
     
     def get_service(self):
         """
         Get an authorized Drive service instance.
         
+        The service is built once per credentials file and shared process-wide,
+        so only the first call pays for the token load and discovery build.
+        
         Returns:
             Tuple[object, str]: (service object, error message if any)
         """
         try:
-            creds = None
-            # Load existing token if it exists
-            if os.path.exists(self.token_path):
-                with open(self.token_path, 'rb') as token:
-                    creds = pickle.load(token)
-            
-            # If no valid credentials available, let user log in
-            if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(Request())
-                else:
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        self.credentials_path, self.SCOPES)
-                    creds = flow.run_local_server(port=0)
-                
-                # Save the credentials for the next run
-                with open(self.token_path, 'wb') as token:
-                    pickle.dump(creds, token)
-            
-            # Build and return the Drive service
-            self.service = build('drive', 'v3', credentials=creds)
+            self.service = _get_cached_service(self.credentials_path)
             return self.service, None
             
         except Exception as e:
-            error_msg = f"Error initializing Drive service: {str(e)}"
-            logger.error(error_msg)
-            return None, error_msg
+            logger.error("Error initializing Drive service: %s", e)
+            return None, f"Error initializing Drive service: {e}"
     
     def list_files(self, max_results: int = 10):
         """
@@ -90,26 +355,35 @@ class DriveService:
                 if error:
                     return [], error
             
-            results = self.service.files().list(
-                pageSize=max_results,
-                fields="nextPageToken, files(id, name, mimeType, createdTime)"
-            ).execute()
-            
-            files = results.get('files', [])
+            files = _list_files_paged(
+                self.service,
+                max_results,
+                fields=_LIST_FIELDS
+            )
             return files, None
             
         except Exception as e:
-            error_msg = f"Error listing files: {str(e)}"
-            logger.error(error_msg)
-            return [], error_msg
+            logger.error("Error listing files: %s", e)
+            return [], f"Error listing files: {e}"
 
 class DocumentStoreService:
     """Service class for Google Drive document operations."""
     
-    def __init__(self, credentials_path: str):
-        """Initialize with the same credentials as DriveService."""
-        self.drive_service = DriveService(credentials_path)
-        self.service = None
+    def __init__(self, credentials_path: str, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Initialize with the same credentials as DriveService.
+        
+        Args:
+            credentials_path (str): Path to the credentials JSON file
+            cache_dir (Optional[str]): Directory for the local file content cache,
+                created on the first write. Defaults to ~/.cache/ihubpt/drive.
+            cache_max_bytes (int): Size cap of the local file content cache
+        """
+        self.drive_service = DriveService.get_instance(credentials_path)
+        self.service = self.drive_service.service
+        self.cache_dir = cache_dir or os.path.join(Path.home(), '.cache', 'ihubpt', 'drive')
+        self.cache_max_bytes = cache_max_bytes
     
     def _ensure_service(self) -> Tuple[bool, Optional[str]]:
         """Ensure we have an active service connection."""
@@ -120,13 +394,15 @@ class DocumentStoreService:
             self.service = service
         return True, None
 
-    def search_files(self, query: str, max_results: int = 10) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    def search_files(self, query: str, max_results: int = 10,
+                     fields: str = FIELDS_FULL) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
         Search for files in Google Drive using a query string.
         
         Args:
             query (str): Search query (follows Google Drive search syntax)
             max_results (int): Maximum number of results to return
+            fields (str): File fields to return, e.g. FIELDS_MIN, FIELDS_LIST or FIELDS_FULL
             
         Returns:
             Tuple[List[Dict], Optional[str]]: (list of files, error message if any)
@@ -136,23 +412,22 @@ class DocumentStoreService:
             if not success:
                 return [], error
             
-            results = self.service.files().list(
+            files = _list_files_paged(
+                self.service,
+                max_results,
                 q=query,
-                pageSize=max_results,
-                fields="files(id, name, mimeType, createdTime, modifiedTime, size)",
+                fields=f"nextPageToken, {fields}",
                 orderBy="modifiedTime desc"
-            ).execute()
-            
-            return results.get('files', []), None
+            )
+            return files, None
             
         except Exception as e:
-            error_msg = f"Error searching files: {str(e)}"
-            logger.error(error_msg)
-            return [], error_msg
+            logger.error("Error searching files: %s", e)
+            return [], f"Error searching files: {e}"
 
     def get_file_content(self, file_id: str) -> Tuple[Optional[str], Optional[str]]:
         """
-        Fetch and read the content of a file from Google Drive.
+        Fetch and read the content of a file from Google Drive as UTF-8 text.
         
         Args:
             file_id (str): The ID of the file to read
@@ -160,30 +435,274 @@ class DocumentStoreService:
         Returns:
             Tuple[Optional[str], Optional[str]]: (file content, error message if any)
         """
+        return self.get_file_text(file_id)
+
+    def get_file_text(self, file_id: str, encoding: str = 'utf-8') -> Tuple[Optional[str], Optional[str]]:
+        """
+        Fetch the content of a file from Google Drive and decode it.
+        
+        Args:
+            file_id (str): The ID of the file to read
+            encoding (str): Text encoding of the file (default: utf-8)
+            
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (file content, error message if any)
+        """
+        return self._fetch_file_text(file_id, encoding)
+
+    def get_file_bytes(self, file_id: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Fetch the raw content of a file from Google Drive without decoding it.
+        
+        Args:
+            file_id (str): The ID of the file to read
+            
+        Returns:
+            Tuple[Optional[bytes], Optional[str]]: (file content, error message if any)
+        """
+        return self._fetch_file_bytes(file_id)
+
+    def download_file(self, file_id: str, sink: BinaryIO) -> Tuple[bool, Optional[str]]:
+        """
+        Stream a file from Google Drive into a writable binary file object.
+        
+        Chunks are written to the sink as they arrive, so large files never have
+        to be held in memory. The local content cache is bypassed.
+        
+        Args:
+            file_id (str): The ID of the file to download
+            sink (BinaryIO): Writable binary file object receiving the content
+            
+        Returns:
+            Tuple[bool, Optional[str]]: (success status, error message if any)
+        """
         try:
             success, error = self._ensure_service()
             if not success:
-                return None, error
+                return False, error
             
-            # Get the file metadata first
-            file = self.service.files().get(fileId=file_id, fields="mimeType").execute()
+            request = self.service.files().get_media(fileId=file_id)
+            self._download(request, sink)
+            return True, None
+            
+        except Exception as e:
+            logger.error("Error downloading file: %s", e)
+            return False, f"Error downloading file: {e}"
+
+    async def get_many_file_contents(self, file_ids: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Fetch the content of several files concurrently.
+        
+        Downloads run in worker threads, so total latency is roughly that of the
+        slowest file instead of the sum of all of them.
+        
+        Args:
+            file_ids (List[str]): The IDs of the files to read
+            
+        Returns:
+            List[Tuple[Optional[str], Optional[str]]]: (file content, error message if any)
+                for each file, in the same order as file_ids
+        """
+        success, error = self._ensure_service()
+        if not success:
+            return [(None, error)] * len(file_ids)
+        
+        # Refresh once up front so worker threads don't race to refresh the token
+        try:
+            await refresh_credentials(self.drive_service.credentials_path)
+        except Exception as e:
+            logger.warning("Drive credential refresh failed: %s", e)
+        
+        return list(await asyncio.gather(*(
+            asyncio.to_thread(self._fetch_file_text, file_id, 'utf-8', True)
+            for file_id in file_ids
+        )))
+
+    def _fetch_file_text(self, file_id: str, encoding: str = 'utf-8', thread_local_http: bool = False,
+                         modified_time: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Download a file's content and decode it.
+        
+        Args:
+            file_id (str): The ID of the file to read
+            encoding (str): Text encoding of the file
+            thread_local_http (bool): Use a per-thread HTTP client
+            modified_time (Optional[str]): The file's modifiedTime, if already known
+            
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (file content, error message if any)
+        """
+        data, error = self._fetch_file_bytes(file_id, thread_local_http, modified_time)
+        if error:
+            return None, error
+        try:
+            return data.decode(encoding), None
+        except UnicodeDecodeError as e:
+            logger.error("Error getting file content: %s", e)
+            return None, f"Error getting file content: {e}"
+
+    def _fetch_file_bytes(self, file_id: str, thread_local_http: bool = False,
+                          modified_time: Optional[str] = None) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Download a file's raw content, optionally over this thread's own HTTP client.
+        
+        Args:
+            file_id (str): The ID of the file to read
+            thread_local_http (bool): Use a per-thread HTTP client; required when
+                called from worker threads since httplib2 clients are not thread-safe
+            modified_time (Optional[str]): The file's modifiedTime, if already known;
+                skips the metadata request used to validate the cache
+                
+        Returns:
+            Tuple[Optional[bytes], Optional[str]]: (file content, error message if any)
+        """
+        try:
+            success, error = self._ensure_service()
+            if not success:
+                return None, error
             
-            # Download the file content
             request = self.service.files().get_media(fileId=file_id)
-            file_content = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_content, request)
+            if thread_local_http:
+                request.http = _thread_http(request.http.credentials)
+            
+            # Serve unchanged files from the local cache
+            if modified_time is None:
+                metadata_request = self.service.files().get(fileId=file_id, fields="modifiedTime")
+                modified_time = metadata_request.execute(http=request.http)['modifiedTime']
+            data = self._read_cached_content(file_id, modified_time)
+            if data is None:
+                file_content = io.BytesIO()
+                self._download(request, file_content)
+                data = file_content.getvalue()
+                self._write_cached_content(file_id, modified_time, data)
+            
+            return data, None
+            
+        except Exception as e:
+            logger.error("Error getting file content: %s", e)
+            return None, f"Error getting file content: {e}"
+
+    def _download(self, request, sink: BinaryIO) -> None:
+        """
+        Run a media download request to completion, writing chunks to the sink.
+        
+        Args:
+            request: A files().get_media request
+            sink (BinaryIO): Writable binary file object receiving the content
+        """
+        downloader = MediaIoBaseDownload(sink, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+
+    def _read_cached_content(self, file_id: str, modified_time: str) -> Optional[bytes]:
+        """
+        Get a file's cached content if it matches the given modification time.
+        
+        Args:
+            file_id (str): The ID of the file
+            modified_time (str): The file's current modifiedTime in Drive
+            
+        Returns:
+            Optional[bytes]: The cached content, or None on a cache miss
+        """
+        path = os.path.join(self.cache_dir, file_id)
+        try:
+            with open(path, 'rb') as f:
+                cached = f.read()
+        except FileNotFoundError:
+            return None
+        
+        cached_time, _, compressed = cached.partition(b'\n')
+        if cached_time.decode('ascii') != modified_time:
+            return None
+        try:
+            # Mark the entry as recently used so eviction keeps it
+            os.utime(path)
+        except OSError:
+            pass
+        try:
+            return zlib.decompress(compressed)
+        except zlib.error:
+            logger.warning("Discarding corrupt cache entry for file %s", file_id)
+            return None
+
+    def _write_cached_content(self, file_id: str, modified_time: str, data: bytes) -> None:
+        """
+        Store a file's content in the cache, replacing any older version.
+        
+        Args:
+            file_id (str): The ID of the file
+            modified_time (str): The file's modifiedTime in Drive
+            data (bytes): The file content
+        """
+        path = os.path.join(self.cache_dir, file_id)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(modified_time.encode('ascii') + b'\n' + zlib.compress(data, CACHE_COMPRESSION_LEVEL))
+            os.replace(temp_path, path)
+            self._evict_cached_content()
+        except OSError as e:
+            logger.warning("Failed to cache content for file %s: %s", file_id, e)
+
+    def _evict_cached_content(self) -> None:
+        """Delete the least recently used cache entries until the cache fits in cache_max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_file_content_by_name(self, name: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Fetch the content of a file by its exact name.
+        
+        The lookup also returns the file's modifiedTime, so the download can check
+        the local cache without a separate metadata request.
+        
+        Args:
+            name (str): The exact name of the file to read
             
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (file content, error message if any)
+        """
+        try:
+            success, error = self._ensure_service()
+            if not success:
+                return None, error
             
-            content = file_content.getvalue().decode('utf-8')
-            return content, None
+            results = self.service.files().list(
+                q=_name_query(name),
+                pageSize=1,
+                fields="files(id, modifiedTime)",
+                orderBy="modifiedTime desc"
+            ).execute()
+            
+            files = results.get('files', [])
+            if not files:
+                return None, f"No file found with name: {name}"
+            
+            return self._fetch_file_text(files[0]['id'], modified_time=files[0]['modifiedTime'])
             
         except Exception as e:
-            error_msg = f"Error getting file content: {str(e)}"
-            logger.error(error_msg)
-            return None, error_msg
+            logger.error("Error getting file content by name: %s", e)
+            return None, f"Error getting file content by name: {e}"
 
     def create_file(self, name: str, content: str, mime_type: str = 'text/plain') -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
@@ -208,35 +727,27 @@ class DocumentStoreService:
                 'mimeType': mime_type
             }
             
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
-                temp_file.write(content)
-                temp_file_path = temp_file.name
+            # Upload straight from memory; small files go in a single multipart request
+            data = content.encode('utf-8')
+            media = MediaIoBaseUpload(
+                io.BytesIO(data),
+                mimetype=mime_type,
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=len(data) >= RESUMABLE_UPLOAD_THRESHOLD
+            )
+            
+            # Create the file
+            file = self.service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields=_CREATE_FIELDS
+            ).execute()
+            
+            return file, None
             
-            try:
-                # Create media content
-                media = MediaFileUpload(
-                    temp_file_path,
-                    mimetype=mime_type,
-                    resumable=True
-                )
-                
-                # Create the file
-                file = self.service.files().create(
-                    body=file_metadata,
-                    media_body=media,
-                    fields='id, name, mimeType, createdTime, modifiedTime, size'
-                ).execute()
-                
-                return file, None
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_file_path)
-                
         except Exception as e:
-            error_msg = f"Error creating file: {str(e)}"
-            logger.error(error_msg)
-            return None, error_msg
+            logger.error("Error creating file: %s", e)
+            return None, f"Error creating file: {e}"
 
     def find_file_by_name(self, name: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
@@ -246,12 +757,13 @@ class DocumentStoreService:
             name (str): The exact name of the file to find
             
         Returns:
-            Tuple[Optional[Dict], Optional[str]]: (file metadata if found, error message if any)
+            Tuple[Optional[Dict], Optional[str]]: (file metadata with the FIELDS_FULL
+                fields if found, error message if any)
         """
         try:
-            # Search for files with the exact name
-            query = f"name = '{name}'"
-            files, error = self.search_files(query, max_results=1)
+            # Search for files with the exact name, returning their full metadata
+            query = _name_query(name)
+            files, error = self.search_files(query, max_results=1, fields=FIELDS_FULL)
             
             if error:
                 return None, error
@@ -262,87 +774,5 @@ class DocumentStoreService:
             return files[0], None
             
         except Exception as e:
-            error_msg = f"Error finding file: {str(e)}"
-            logger.error(error_msg)
-            return None, error_msg
-
-if __name__ == "__main__":
-    # Test the Document Store Service
-    credentials_path = os.path.join(Path(__file__).parent.parent, 'credentials', 'google_credentials.json')
-    doc_service = DocumentStoreService(credentials_path)
-    
-    print("Testing Document Store Service...")
-    
-    # Test file creation
-    print("\nCreating a test file...")
-    test_content = "This is a test document created by DocumentStoreService"
-    file, error = doc_service.create_file("test_document.txt", test_content)
-    if error:
-        print(f"Error creating file: {error}")
-    else:
-        print(f"Created file: {file['name']} (ID: {file['id']})")
-        
-        # Test file search
-        print("\nSearching for text files...")
-        files, error = doc_service.search_files("mimeType = 'text/plain'", max_results=5)
-        if error:
-            print(f"Error searching files: {error}")
-        else:
-            print("Found files:")
-            for f in files:
-                print(f"- {f['name']} ({f['id']})")
-        
-        # Test content retrieval
-        print("\nRetrieving file content...")
-        content, error = doc_service.get_file_content(file['id'])
-        if error:
-            print(f"Error getting content: {error}")
-        else:
-            print(f"File content: {content}")
-        
-        # Test find by name
-        print("\nFinding file by name...")
-        found_file, error = doc_service.find_file_by_name("test_document.txt")
-        if error:
-            print(f"Error finding file: {error}")
-        else:
-            print(f"Found file: {found_file['name']} (ID: {found_file['id']})")
-
-    # Test the Drive and Gmail services
-    credentials_path = os.path.join(Path(__file__).parent.parent, 'credentials', 'google_credentials.json')
-    service = DriveService(credentials_path)
-    
-    print("Testing Google Services access...")
-    
-    # Get credentials first
-    _, error = service.get_service()
-    if error:
-        print(f"Error getting service: {error}")
-        exit(1)
-    
-    # Test Drive access
-    print("\nTesting Drive access:")
-    files, error = service.list_files(max_results=5)
-    if error:
-        print(f"Drive Error: {error}")
-    else:
-        print("Drive files found:")
-        for file in files:
-            print(f"- {file['name']} ({file['id']})")
-    
-    # Test Gmail access
-    print("\nTesting Gmail access:")
-    try:
-        creds = None
-        if os.path.exists(service.token_path):
-            with open(service.token_path, 'rb') as token:
-                creds = pickle.load(token)
-        
-        gmail_service = build('gmail', 'v1', credentials=creds)
-        results = gmail_service.users().labels().list(userId='me').execute()
-        labels = results.get('labels', [])
-        print("Gmail labels found:")
-        for label in labels:
-            print(f"- {label['name']} ({label['id']})")
-    except Exception as e:
-        print(f"Gmail Error: {str(e)}") 
\ No newline at end of file
+            logger.error("Error finding file: %s", e)
+            return None, f"Error finding file: {e}"
@@ -4,24 +4,75 @@ This module defines all the FastAPI endpoints for the application, including
 agent management, tool registration, and chat functionality.
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from .models import Agent, AgentCreate, AgentUpdate, AgentStatus, AgentResponse, ChatMessage, ChatLog, ChatLogCreate
 from .engine import agent_engine
+from .dispatcher import agent_dispatcher
 from .tools import tool_registry, FUNCTION_MAP, SCHEMA_MAP
-from .vector_store import vector_store
+from .vector_store import vector_store, DOCUMENTS_COLLECTION
+from .query_cache import query_cache
+from .document_batcher import document_batcher
+from .semantic_cache import context_key, semantic_cache
+from .config import get_settings
 from langchain.schema import Document
 from datetime import datetime
+import asyncio
+import concurrent.futures
+import functools
 import logging
 from langchain.tools import Tool
-import json
+import orjson
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Dedicated pool for blocking ChromaDB and engine calls, so they neither block the
+# event loop nor compete with Starlette's shared threadpool
+_IO_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=get_settings().IO_POOL_WORKERS,
+    thread_name_prefix="endpoints-io"
+)
+
+async def _run(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call on the I/O pool and wait for its result."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _IO_POOL, functools.partial(func, *args, **kwargs)
+    )
+
+# Upper bound on k for vector searches; larger values turn a search into a collection scan
+MAX_SEARCH_RESULTS = 50
+# Upper bound on the number of queries in one batch search
+MAX_BATCH_QUERIES = 64
+
+# Cacheable chat replies being generated, keyed by (agent ID, history key, message),
+# so identical messages arriving together share one LLM call
+_pending_replies: Dict[Tuple[str, str, str], "asyncio.Task[str]"] = {}
+
+# Validates and serializes chat log lists in one pass inside pydantic-core
+_chat_logs_adapter = TypeAdapter(List[ChatLog])
+# Serializes agent lists; agents are already validated when loaded, so they are not re-validated
+_agents_adapter = TypeAdapter(List[Agent])
+
+def _chat_logs_response(logs: List[dict]) -> Response:
+    """Build a JSON response for a list of chat logs without FastAPI's generic encoder."""
+    return Response(
+        content=_chat_logs_adapter.dump_json(_chat_logs_adapter.validate_python(logs)),
+        media_type="application/json"
+    )
+
+def _agent_response(agent: Agent) -> Response:
+    """Build a JSON response for an agent without re-validating it against the response model."""
+    return Response(content=agent.model_dump_json(), media_type="application/json")
+
+def _agents_response(agents: List[Agent]) -> Response:
+    """Build a JSON response for a list of agents without re-validating them."""
+    return Response(content=_agents_adapter.dump_json(agents), media_type="application/json")
+
 @router.post("/agents", response_model=Agent)
 async def create_agent(agent: AgentCreate):
     """Create a new agent in the system.
@@ -35,56 +86,49 @@ async def create_agent(agent: AgentCreate):
     Raises:
         HTTPException: If tool validation fails or agent creation fails.
     """
-    try:
-        logger.info(f"Creating new agent with name: {agent.name}")
-        
-        # Validate tool names
-        for tool_name in agent.tools:
-            try:
-                tool_registry.get_tool(tool_name)
-            except ValueError as e:
-                logger.warning(f"Tool {tool_name} not found")
-                raise HTTPException(status_code=400, detail=f"Tool {tool_name} not found")
-        
-        # Create a new agent with default status
-        new_agent = Agent(
-            name=agent.name,
-            description=agent.description,
-            prompt=agent.prompt,
-            tools=agent.tools,  # Keep as tool names
-            hitl_enabled=agent.hitl_enabled,
-            status=AgentStatus.IDLE,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        logger.info(f"Created agent object with ID: {new_agent.id}")
-        
-        # Store the agent in ChromaDB
-        try:
-            stored_agent = agent_engine.create_agent(new_agent)
-            logger.info(f"Successfully stored agent in ChromaDB with ID: {stored_agent.id}")
-            return stored_agent
-        except Exception as e:
-            logger.error(f"Failed to store agent in ChromaDB: {str(e)}")
-            raise
-    except Exception as e:
-        logger.error(f"Error creating agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("Creating new agent with name: %s", agent.name)
+    
+    # Validate tool names
+    missing = set(agent.tools) - tool_registry.names()
+    if missing:
+        logger.warning("Tools not found: %s", sorted(missing))
+        raise HTTPException(status_code=400, detail=f"Tools not found: {sorted(missing)}")
+    
+    # Create a new agent with default status
+    now = datetime.utcnow()
+    new_agent = Agent(
+        name=agent.name,
+        description=agent.description,
+        prompt=agent.prompt,
+        tools=agent.tools,  # Keep as tool names
+        hitl_enabled=agent.hitl_enabled,
+        status=AgentStatus.IDLE,
+        created_at=now,
+        updated_at=now
+    )
+    logger.info("Created agent object with ID: %s", new_agent.id)
+    
+    # Store the agent in ChromaDB
+    stored_agent = await _run(agent_engine.create_agent, new_agent)
+    logger.info("Successfully stored agent in ChromaDB with ID: %s", stored_agent.id)
+    return _agent_response(stored_agent)
 
 @router.get("/agents", response_model=List[Agent])
-async def list_agents():
-    """List all agents in the system.
+async def list_agents(limit: int = Query(100, ge=1), offset: int = Query(0, ge=0)):
+    """List the agents in the system, one page at a time.
+    
+    Args:
+        limit (int, optional): Maximum number of agents to return. Defaults to 100.
+        offset (int, optional): Number of agents to skip. Defaults to 0.
     
     Returns:
-        List[Agent]: List of all agents.
+        List[Agent]: The requested page of agents.
         
     Raises:
         HTTPException: If there's an error retrieving the agents.
     """
-    try:
-        return agent_engine.get_agents()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    agents = await _run(agent_engine.get_agents, limit=limit, offset=offset)
+    return _agents_response(agents)
 
 @router.get("/agents/{agent_id}", response_model=Agent)
 async def get_agent(agent_id: str):
@@ -99,13 +143,7 @@ async def get_agent(agent_id: str):
     Raises:
         HTTPException: If the agent is not found or there's an error retrieving it.
     """
-    try:
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        return agent
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return _agent_response(await _run(agent_engine.get_or_raise, agent_id))
 
 @router.put("/agents/{agent_id}", response_model=Agent)
 async def update_agent(agent_id: str, agent_update: AgentUpdate):
@@ -121,80 +159,57 @@ async def update_agent(agent_id: str, agent_update: AgentUpdate):
     Raises:
         HTTPException: If the agent is not found, tool validation fails, or update fails.
     """
-    try:
-        logger.info(f"Received update request for agent ID: {agent_id}")
-        logger.info(f"Update data received: {agent_update}")
-        
-        # Get the agent from the database
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            logger.error(f"Agent not found with ID: {agent_id}")
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Convert agent_update to dict, excluding None values
-        update_data = agent_update.dict(exclude_unset=True, exclude_none=True)
-        logger.info(f"Processed update data for agent {agent_id}: {update_data}")
-        
-        # Validate tool names if tools are being updated
-        if "tools" in update_data:
-            logger.info(f"Validating tools: {update_data['tools']}")
-            for tool_name in update_data["tools"]:
-                try:
-                    tool_registry.get_tool(tool_name)
-                except ValueError as e:
-                    logger.warning(f"Tool {tool_name} not found")
-                    raise HTTPException(status_code=400, detail=f"Tool {tool_name} not found")
-        
-        # Update the agent
-        try:
-            updated_agent = agent_engine.update_agent(agent_id, update_data)
-            if not updated_agent:
-                logger.error(f"Failed to update agent {agent_id} in database")
-                raise HTTPException(status_code=500, detail="Failed to update agent")
-            logger.info(f"Successfully updated agent {agent_id}")
-            return updated_agent
-        except Exception as e:
-            logger.error(f"Error in agent_engine.update_agent: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
-            
-    except ValueError as e:
-        logger.error(f"Validation error updating agent: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Unexpected error updating agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("Received update request for agent ID: %s", agent_id)
+    logger.info("Update data received: %s", agent_update)
+    
+    # Convert agent_update to dict, excluding None values
+    update_data = agent_update.model_dump(exclude_unset=True, exclude_none=True)
+    logger.info("Processed update data for agent %s: %s", agent_id, update_data)
+    
+    # Validate tool names if tools are being updated
+    if "tools" in update_data:
+        logger.info("Validating tools: %s", update_data['tools'])
+        missing = set(update_data["tools"]) - tool_registry.names()
+        if missing:
+            logger.warning("Tools not found: %s", sorted(missing))
+            raise HTTPException(status_code=400, detail=f"Tools not found: {sorted(missing)}")
+    
+    # Update the agent
+    updated_agent = await _run(agent_engine.update_agent, agent_id, update_data)
+    if not updated_agent:
+        logger.error("Agent not found with ID: %s", agent_id)
+        raise HTTPException(status_code=404, detail="Agent not found")
+    # Cached replies may no longer match the agent's prompt
+    await _run(semantic_cache.clear, agent_id)
+    logger.info("Successfully updated agent %s", agent_id)
+    return _agent_response(updated_agent)
 
-@router.post("/agents/{agent_id}/start")
+@router.post("/agents/{agent_id}/start", status_code=202)
 async def start_agent(agent_id: str):
     """Start an agent's workflow.
     
+    The start is queued for the agent dispatcher and this returns 202 Accepted
+    immediately; poll the status endpoint to see when it is RUNNING.
+    
     Args:
         agent_id (str): The unique identifier of the agent to start.
         
     Returns:
-        dict: Status message indicating successful start.
+        dict: Status message indicating the start was queued.
         
     Raises:
         HTTPException: If the agent is not found or there's an error starting it.
     """
-    try:
-        # Get the agent from the database
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Start the agent
-        agent_engine.start_agent(agent)
-        
-        # Update agent status
-        agent_engine.update_agent(agent_id, {"status": AgentStatus.RUNNING})
-        
-        return {"status": "success", "message": f"Agent {agent_id} started"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error starting agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get the agent from the database
+    agent = await _run(agent_engine.get_or_raise, agent_id)
+    
+    if agent_engine.is_running(agent_id) or agent_dispatcher.is_pending(agent_id):
+        raise HTTPException(status_code=400, detail=f"Agent {agent_id} is already running")
+    
+    # Queue the start; the worker also records the RUNNING status
+    await agent_dispatcher.submit_start(agent)
+    
+    return {"status": "queued", "message": f"Agent {agent_id} start queued"}
 
 @router.post("/agents/{agent_id}/pause")
 async def pause_agent(agent_id: str):
@@ -209,24 +224,10 @@ async def pause_agent(agent_id: str):
     Raises:
         HTTPException: If the agent is not found or there's an error pausing it.
     """
-    try:
-        # Get the agent from the database
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Pause the agent
-        agent_engine.pause_agent(agent_id)
-        
-        # Update agent status
-        agent_engine.update_agent(agent_id, {"status": AgentStatus.PAUSED})
-        
-        return {"status": "success", "message": f"Agent {agent_id} paused"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error pausing agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Pause the agent; this also records the PAUSED status and 404s for unknown IDs
+    await _run(agent_engine.pause_agent, agent_id)
+    
+    return {"status": "success", "message": f"Agent {agent_id} paused"}
 
 @router.post("/agents/{agent_id}/resume")
 async def resume_agent(agent_id: str):
@@ -241,24 +242,10 @@ async def resume_agent(agent_id: str):
     Raises:
         HTTPException: If the agent is not found or there's an error resuming it.
     """
-    try:
-        # Get the agent from the database
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Resume the agent
-        agent_engine.resume_agent(agent_id)
-        
-        # Update agent status
-        agent_engine.update_agent(agent_id, {"status": AgentStatus.RUNNING})
-        
-        return {"status": "success", "message": f"Agent {agent_id} resumed"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error resuming agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Resume the agent; this also records the RUNNING status and 404s for unknown IDs
+    await _run(agent_engine.resume_agent, agent_id)
+    
+    return {"status": "success", "message": f"Agent {agent_id} resumed"}
 
 @router.delete("/agents/{agent_id}")
 async def delete_agent(agent_id: str):
@@ -273,27 +260,13 @@ async def delete_agent(agent_id: str):
     Raises:
         HTTPException: If the agent is not found or there's an error deleting it.
     """
-    try:
-        # Get the agent from the database
-        agent = agent_engine.get_agent(agent_id)
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Stop the agent if it's running
-        if agent.status == AgentStatus.RUNNING:
-            agent_engine.pause_agent(agent_id)
-        
-        # Delete the agent
-        success = agent_engine.delete_agent(agent_id)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete agent")
-        
-        return {"status": "success", "message": f"Agent {agent_id} deleted"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error deleting agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Delete the agent; this stops it first if it is running and 404s for unknown IDs
+    success = await _run(agent_engine.delete_agent, agent_id)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to delete agent")
+    await _run(semantic_cache.clear, agent_id)
+    
+    return {"status": "success", "message": f"Agent {agent_id} deleted"}
 
 @router.get("/agents/{agent_id}/status")
 async def get_agent_status(agent_id: str):
@@ -308,11 +281,8 @@ async def get_agent_status(agent_id: str):
     Raises:
         HTTPException: If there's an error retrieving the status.
     """
-    try:
-        status = agent_engine.get_agent_status(agent_id)
-        return {"status": status}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    status = await _run(agent_engine.get_agent_status, agent_id)
+    return {"status": status}
 
 @router.get("/tools")
 async def list_tools():
@@ -336,14 +306,11 @@ async def unregister_tool(tool_name: str):
     Raises:
         HTTPException: If the tool is not found or there's an error unregistering it.
     """
-    try:
-        tool_registry.unregister_tool(tool_name)
-        return {"message": f"Tool {tool_name} unregistered successfully"}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error unregistering tool: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    if tool_name not in tool_registry.names():
+        raise HTTPException(status_code=404, detail=f"Tool {tool_name} not found")
+    
+    await _run(tool_registry.unregister_tool, tool_name)
+    return {"message": f"Tool {tool_name} unregistered successfully"}
 
 @router.post("/tools", response_model=dict)
 async def register_tool(tool: dict):
@@ -363,52 +330,43 @@ async def register_tool(tool: dict):
         HTTPException: If required fields are missing, tool already exists,
             function not found, or registration fails.
     """
-    try:
-        # Validate required fields
-        if not tool.get("name") or not tool.get("description") or not tool.get("func"):
-            raise HTTPException(status_code=400, detail="Tool name, description, and function name are required")
-            
-        # Check if tool already exists
-        try:
-            tool_registry.get_tool(tool["name"])
-            raise HTTPException(status_code=400, detail=f"Tool {tool['name']} is already registered")
-        except ValueError:
-            pass
-            
-        # Validate function exists
-        if tool["func"] not in FUNCTION_MAP:
-            raise HTTPException(status_code=400, detail=f"Function {tool['func']} not found in available functions")
-            
-        # Get the function and schema
-        func = FUNCTION_MAP[tool["func"]]
-        schema_name = tool.get("schema_name")
-        schema_class = SCHEMA_MAP.get(schema_name) if schema_name else None
-        
-        # Create a new tool
-        new_tool = Tool.from_function(
-            func=func,
-            name=tool["name"],
-            description=tool["description"],
-            args_schema=schema_class
-        )
-        
-        # Register the tool
-        tool_registry.register_tool(new_tool)
-        
-        return {
-            "message": f"Tool {tool['name']} registered successfully",
-            "tool": {
-                "name": new_tool.name,
-                "description": new_tool.description,
-                "parameters": new_tool.args_schema.schema() if new_tool.args_schema else {}
-            }
+    # Validate required fields
+    if not tool.get("name") or not tool.get("description") or not tool.get("func"):
+        raise HTTPException(status_code=400, detail="Tool name, description, and function name are required")
+        
+    # Check if tool already exists
+    if tool["name"] in tool_registry.names():
+        raise HTTPException(status_code=400, detail=f"Tool {tool['name']} is already registered")
+        
+    # Validate function exists
+    if tool["func"] not in FUNCTION_MAP:
+        raise HTTPException(status_code=400, detail=f"Function {tool['func']} not found in available functions")
+        
+    # Get the function and schema
+    func = FUNCTION_MAP[tool["func"]]
+    schema_name = tool.get("schema_name")
+    schema_class = SCHEMA_MAP.get(schema_name) if schema_name else None
+    
+    # Create a new tool
+    new_tool = Tool.from_function(
+        func=func,
+        name=tool["name"],
+        description=tool["description"],
+        args_schema=schema_class
+    )
+    
+    # Register the tool
+    await _run(tool_registry.register_tool, new_tool)
+    
+    return {
+        "message": f"Tool {tool['name']} registered successfully",
+        "tool": {
+            "name": new_tool.name,
+            "description": new_tool.description,
+            "parameters": tool_registry.get_schema(new_tool.name)
         }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error registering tool: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    }
+    
 
 @router.post("/vector-store/documents")
 async def add_documents(documents: List[dict]):
@@ -425,25 +383,27 @@ async def add_documents(documents: List[dict]):
     Raises:
         HTTPException: If there's an error adding the documents.
     """
-    try:
-        # Convert dictionaries to Document objects
-        docs = [Document(
-            page_content=doc["text"],
-            metadata=doc.get("metadata", {})
-        ) for doc in documents]
-        
-        vector_store.add_documents(docs)
-        return {"status": "success", "message": f"Added {len(docs)} documents"}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    if any("text" not in doc for doc in documents):
+        raise HTTPException(status_code=400, detail="Every document needs a text field")
+    
+    # Convert dictionaries to Document objects
+    docs = [Document(
+        page_content=doc["text"],
+        metadata=doc.get("metadata", {})
+    ) for doc in documents]
+    
+    # Written in DOCUMENT_BATCH_SIZE chunks, together with any concurrent uploads
+    await document_batcher.add(docs)
+    query_cache.invalidate(DOCUMENTS_COLLECTION)
+    return {"status": "success", "message": f"Added {len(docs)} documents"}
 
 @router.get("/vector-store/search")
-async def search_documents(query: str, k: int = 4):
+async def search_documents(query: str, k: int = Query(4, ge=1, le=MAX_SEARCH_RESULTS)):
     """Search for similar documents in the vector store.
     
     Args:
         query (str): The search query text.
-        k (int, optional): Number of results to return. Defaults to 4.
+        k (int, optional): Number of results to return, 1 to MAX_SEARCH_RESULTS. Defaults to 4.
         
     Returns:
         dict: Dictionary containing search results with content and metadata.
@@ -451,27 +411,26 @@ async def search_documents(query: str, k: int = 4):
     Raises:
         HTTPException: If there's an error performing the search.
     """
-    try:
-        results = vector_store.search(query, k=k)
-        return {
-            "results": [
-                {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata
-                }
-                for doc in results
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if not query.strip():
+        return ORJSONResponse({"results": []})
+    
+    key = query_cache.make_key(DOCUMENTS_COLLECTION, "search", query, k)
+    results = query_cache.get(key)
+    if results is None:
+        results = await _run(vector_store.search, query, k=k)
+        query_cache.put(key, results)
+    # Serialize directly with orjson; the generic encoder would walk every metadata value
+    return ORJSONResponse({
+        "results": [{"content": doc.page_content, "metadata": doc.metadata} for doc in results]
+    })
 
 @router.get("/vector-store/search-with-score")
-async def search_documents_with_score(query: str, k: int = 4):
+async def search_documents_with_score(query: str, k: int = Query(4, ge=1, le=MAX_SEARCH_RESULTS)):
     """Search for similar documents with similarity scores.
     
     Args:
         query (str): The search query text.
-        k (int, optional): Number of results to return. Defaults to 4.
+        k (int, optional): Number of results to return, 1 to MAX_SEARCH_RESULTS. Defaults to 4.
         
     Returns:
         dict: Dictionary containing search results with content, metadata, and similarity scores.
@@ -479,20 +438,63 @@ async def search_documents_with_score(query: str, k: int = 4):
     Raises:
         HTTPException: If there's an error performing the search.
     """
-    try:
-        results = vector_store.search_with_score(query, k=k)
-        return {
-            "results": [
-                {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": score
-                }
-                for doc, score in results
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if not query.strip():
+        return ORJSONResponse({"results": []})
+    
+    key = query_cache.make_key(DOCUMENTS_COLLECTION, "search_with_score", query, k)
+    results = query_cache.get(key)
+    if results is None:
+        results = await _run(vector_store.search_with_score, query, k=k)
+        query_cache.put(key, results)
+    return ORJSONResponse({
+        "results": [
+            {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+            for doc, score in results
+        ]
+    })
+
+@router.post("/vector-store/batch-search")
+async def batch_search_documents(
+    queries: List[str] = Body(..., max_length=MAX_BATCH_QUERIES),
+    k: int = Query(4, ge=1, le=MAX_SEARCH_RESULTS)
+):
+    """Search for similar documents for several queries in one request.
+    
+    Results are shared with the search endpoint's cache; only queries missing from it
+    are embedded and searched, together in a single vector store call.
+    
+    Args:
+        queries (List[str]): The search query texts, at most MAX_BATCH_QUERIES.
+        k (int, optional): Number of results per query, 1 to MAX_SEARCH_RESULTS. Defaults to 4.
+        
+    Returns:
+        dict: Dictionary containing one list of results per query, in the order given.
+        
+    Raises:
+        HTTPException: If there's an error performing the search.
+    """
+    keys = {
+        query: query_cache.make_key(DOCUMENTS_COLLECTION, "search", query, k)
+        for query in queries if query.strip()
+    }
+    found = {}
+    for query, key in keys.items():
+        results = query_cache.get(key)
+        if results is not None:
+            found[query] = results
+    
+    misses = [query for query in keys if query not in found]
+    if misses:
+        for query, results in zip(misses, await _run(vector_store.search_batch, misses, k=k)):
+            query_cache.put(keys[query], results)
+            found[query] = results
+    
+    return ORJSONResponse({
+        "results": [
+            [{"content": doc.page_content, "metadata": doc.metadata} for doc in found.get(query, [])]
+            for query in queries
+        ]
+    })
 
 @router.delete("/vector-store/collections/{collection_name}")
 async def delete_collection(collection_name: str):
@@ -507,11 +509,18 @@ async def delete_collection(collection_name: str):
     Raises:
         HTTPException: If there's an error deleting the collection.
     """
-    try:
-        vector_store.delete_collection(collection_name)
-        return {"status": "success", "message": f"Deleted collection {collection_name}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await _run(vector_store.delete_collection, collection_name)
+    query_cache.invalidate(collection_name)
+    return {"status": "success", "message": f"Deleted collection {collection_name}"}
+
+@router.get("/vector-store/cache-stats")
+async def get_search_cache_stats():
+    """Get hit-rate statistics for the vector search result cache.
+    
+    Returns:
+        dict: Cache size, limits, and hit, miss and eviction counts.
+    """
+    return query_cache.stats()
 
 @router.post("/agents/{agent_id}/chat", response_model=ChatMessage)
 async def chat_with_agent(agent_id: str, message: ChatMessage):
@@ -527,43 +536,128 @@ async def chat_with_agent(agent_id: str, message: ChatMessage):
     Raises:
         HTTPException: If the agent is not found or there's an error processing the message.
     """
+    # Get the agent from ChromaDB
+    agent = await _run(agent_engine.get_agent, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    
+    # Tool results change over time and client-supplied history is not stored, so
+    # only replies that depend on the message and the stored history are cached
+    use_cache = (
+        get_settings().SEMANTIC_CACHE_ENABLED
+        and not message.no_cache
+        and not message.chat_history
+        and not agent.tools
+    )
+    if use_cache:
+        start_time = time.monotonic()
+        context = context_key((agent.context or {}).get("chat_history"))
+        embedding, cached_response = await _run(semantic_cache.lookup, agent_id, message.content, context)
+        if cached_response is not None:
+            await agent_engine.record_cached_reply(
+                agent_id, message.content, cached_response,
+                duration_ms=int((time.monotonic() - start_time) * 1000)
+            )
+            return ChatMessage(content=cached_response)
+        return ChatMessage(content=await _shared_reply(agent_id, message.content, embedding, context))
+    
+    # Process the message and get response
+    response = await agent_engine.process_chat_message(
+        agent_id=agent_id,
+        message=message.content
+    )
+    
+    return ChatMessage(content=response)
+
+async def _cached_reply(agent_id: str, content: str, embedding: Optional[List[float]], context: str) -> str:
+    """Generate a reply to a cacheable message and add it to the semantic cache."""
+    response = await agent_engine.process_chat_message(agent_id=agent_id, message=content)
+    await _run(semantic_cache.add, agent_id, response, embedding, context)
+    return response
+
+async def _shared_reply(agent_id: str, content: str, embedding: Optional[List[float]], context: str) -> str:
+    """Get the reply to a cacheable message, joining a request already generating it.
+    
+    The reply is generated in its own task so that one client disconnecting
+    does not cancel it for the others waiting on it.
+    """
+    key = (agent_id, context, content)
+    task = _pending_replies.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_cached_reply(agent_id, content, embedding, context))
+        _pending_replies[key] = task
+        task.add_done_callback(lambda _: _pending_replies.pop(key, None))
+        return await asyncio.shield(task)
+    
+    # The request generating the reply logs and stores the turn once; this one
+    # is only logged, like a cache hit
+    logger.info("Sharing an in-flight reply for agent %s", agent_id)
+    start_time = time.monotonic()
+    response = await asyncio.shield(task)
+    await agent_engine.record_cached_reply(
+        agent_id, content, response,
+        duration_ms=int((time.monotonic() - start_time) * 1000),
+        store_turn=False
+    )
+    return response
+
+async def _sse_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Format streamed response tokens as server-sent events."""
     try:
-        # Get the agent from ChromaDB
-        agent = agent_engine.get_agent(agent_id)  # Synchronous call
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        # Process the message and get response
-        response = await agent_engine.process_chat_message(
-            agent_id=agent_id,
-            message=message.content
-        )
-        
-        return ChatMessage(content=response)
+        async for token in tokens:
+            yield f"data: {orjson.dumps({'delta': token}).decode()}\n\n"
     except Exception as e:
-        logger.error(f"Error in chat_with_agent: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Error in chat stream: %s", e)
+        yield f"event: error\ndata: {orjson.dumps({'detail': str(e)}).decode()}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+@router.post("/agents/{agent_id}/chat/stream")
+async def chat_with_agent_stream(agent_id: str, message: ChatMessage):
+    """Send a chat message to an agent and stream its response.
+    
+    The response is a text/event-stream of ``data: {"delta": "..."}`` events,
+    followed by a ``done`` event, or an ``error`` event if processing fails.
+    
+    Args:
+        agent_id (str): The unique identifier of the agent to chat with.
+        message (ChatMessage): The chat message to send.
+        
+    Returns:
+        StreamingResponse: Server-sent events carrying the response tokens.
+        
+    Raises:
+        HTTPException: If the agent is not found.
+    """
+    agent = await _run(agent_engine.get_agent, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    
+    return StreamingResponse(
+        _sse_events(agent_engine.astream_chat_message(agent_id, message.content)),
+        media_type="text/event-stream"
+    )
 
 @router.get("/agents/{agent_id}/chat-logs", response_model=List[ChatLog])
-async def get_agent_chat_logs(agent_id: str):
-    """Get all chat logs for a specific agent.
+async def get_agent_chat_logs(agent_id: str, limit: int = Query(100, ge=1), offset: int = Query(0, ge=0)):
+    """Get chat logs for a specific agent, one page at a time.
     
     Args:
         agent_id (str): The unique identifier of the agent.
+        limit (int, optional): Maximum number of chat logs to return. Defaults to 100.
+        offset (int, optional): Number of chat logs to skip. Defaults to 0.
         
     Returns:
-        List[ChatLog]: List of chat logs for the specified agent.
+        List[ChatLog]: The requested page of chat logs for the agent.
         
     Raises:
         HTTPException: If there's an error retrieving the chat logs.
     """
-    try:
-        # Get logs from the vector store instead of agent_engine
-        logs = vector_store.get_chat_logs_by_agent(agent_id)
-        return logs
-    except Exception as e:
-        logger.error(f"Error getting chat logs for agent {agent_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get logs from the vector store instead of agent_engine
+    logs = await _run(
+        vector_store.get_chat_logs_by_agent, agent_id, limit=limit, offset=offset
+    )
+    return _chat_logs_response(logs)
 
 @router.get("/agents/{agent_id}/token-usage")
 async def get_agent_token_usage(agent_id: str):
@@ -578,23 +672,46 @@ async def get_agent_token_usage(agent_id: str):
     Raises:
         HTTPException: If there's an error retrieving the token usage.
     """
-    try:
-        return vector_store.get_token_usage_by_agent(agent_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _run(vector_store.get_token_usage_by_agent, agent_id)
+
+@router.get("/agents/{agent_id}/summary")
+async def get_agent_summary(agent_id: str, limit: int = Query(100, ge=1), offset: int = Query(0, ge=0)):
+    """Get a page of chat logs and the token usage for an agent in one request.
+    
+    Combines the chat-logs and token-usage endpoints into a single vector store
+    query. The token usage covers all of the agent's chat logs, not just the
+    returned page.
+    
+    Args:
+        agent_id (str): The unique identifier of the agent.
+        limit (int, optional): Maximum number of chat logs to return. Defaults to 100.
+        offset (int, optional): Number of chat logs to skip. Defaults to 0.
+        
+    Returns:
+        dict: The requested page of the agent's chat logs under "chat_logs" and
+            token usage statistics under "token_usage".
+        
+    Raises:
+        HTTPException: If there's an error retrieving the summary.
+    """
+    return await _run(vector_store.get_agent_summary, agent_id, limit=limit, offset=offset)
 
 @router.get("/chat-logs/timerange", response_model=List[ChatLog])
 async def get_chat_logs_by_timerange(
     start_time: datetime,
     end_time: datetime,
-    agent_id: Optional[str] = None
+    agent_id: Optional[str] = None,
+    limit: int = Query(100, ge=1),
+    offset: int = Query(0, ge=0)
 ):
-    """Get chat logs within a specific time range.
+    """Get a page of chat logs within a specific time range.
     
     Args:
         start_time (datetime): Start of the time range.
         end_time (datetime): End of the time range.
         agent_id (Optional[str]): Optional agent ID to filter logs by.
+        limit (int): Maximum number of chat logs to return.
+        offset (int): Number of chat logs to skip.
         
     Returns:
         List[ChatLog]: List of chat logs within the specified time range.
@@ -602,24 +719,26 @@ async def get_chat_logs_by_timerange(
     Raises:
         HTTPException: If there's an error retrieving the chat logs.
     """
-    try:
-        # Get logs from the vector store instead of agent_engine
-        if agent_id:
-            logs = vector_store.get_chat_logs_by_agent_and_timerange(
-                agent_id,
-                start_time.isoformat(),
-                end_time.isoformat()
-            )
-        else:
-            logs = vector_store.get_chat_logs_by_timerange(
-                start_time.isoformat(),
-                end_time.isoformat()
-            )
-        logger.info(f"Retrieved {len(logs)} chat logs between {start_time} and {end_time}")
-        return logs
-    except Exception as e:
-        logger.error(f"Error getting chat logs by timerange: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get logs from the vector store instead of agent_engine
+    if agent_id:
+        logs = await _run(
+            vector_store.get_chat_logs_by_agent_and_timerange,
+            agent_id,
+            start_time,
+            end_time,
+            limit=limit,
+            offset=offset
+        )
+    else:
+        logs = await _run(
+            vector_store.get_chat_logs_by_timerange,
+            start_time,
+            end_time,
+            limit=limit,
+            offset=offset
+        )
+    logger.info("Retrieved %s chat logs between %s and %s", len(logs), start_time, end_time)
+    return _chat_logs_response(logs)
 
 @router.post("/tools/{tool_name}/execute", response_model=dict)
 async def execute_tool(tool_name: str, parameters: dict):
@@ -635,28 +754,24 @@ async def execute_tool(tool_name: str, parameters: dict):
     Raises:
         HTTPException: If the tool is not found or there's an error executing it.
     """
-    try:
-        # Get the tool
-        tool = tool_registry.get_tool(tool_name)
-        
-        # Execute the tool with parameters
-        result = tool.func(**parameters)
-        
-        # Return the result
-        if isinstance(result, str) and result.startswith('{'):
-            # If result is a JSON string, parse it
-            try:
-                return json.loads(result)
-            except json.JSONDecodeError:
-                return {"result": result}
-        else:
-            return {"result": result}
-            
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error executing tool {tool_name}: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get the tool
+    if tool_name not in tool_registry.names():
+        raise HTTPException(status_code=404, detail=f"Tool {tool_name} not found")
+    tool = tool_registry.get_tool(tool_name)
+    
+    # Execute the tool with parameters
+    result = await _run(tool.func, **parameters)
+    
+    # Return the result
+    if isinstance(result, dict):
+        return result
+    if isinstance(result, str) and result.startswith('{'):
+        # If result is a JSON object string, parse it
+        try:
+            return orjson.loads(result)
+        except orjson.JSONDecodeError:
+            pass
+    return {"result": result}
 
 @router.post("/test/add-sample-chat-logs", response_model=dict)
 async def add_sample_chat_logs(agent_id: str = None):
@@ -672,43 +787,41 @@ async def add_sample_chat_logs(agent_id: str = None):
     Raises:
         HTTPException: If no agents are found or there's an error adding the logs.
     """
-    try:
-        if not agent_id:
-            # Get the first agent in the database
-            agents = agent_engine.get_agents()
-            if not agents:
-                raise HTTPException(status_code=404, detail="No agents found")
-            agent_id = str(agents[0].id)
-        
-        # Create sample chat logs
-        for i in range(1, 6):
-            chat_log_data = {
-                "agent_id": str(agent_id),
-                "request_message": f"Test request {i}",
-                "response_message": f"Test response {i}",
-                "input_tokens": 100 * i,
-                "output_tokens": 50 * i,
-                "total_tokens": 150 * i,
-                "requestor_id": "test-user",
-                "model_name": "gpt-4-turbo-preview",
-                "duration_ms": 1000 * i,
-                "status": "success",
-                "temperature": 0.7,
-                "max_tokens": "4000",
-                "cost": 0.001 * i,
-                "timestamp": datetime.utcnow().isoformat(),
-                "tool_calls": "[]",
-                "has_tool_calls": "false",
-                "memory_summary": "",
-                "has_memory": "false",
-                "user": "Administrator",
-                "department": "Post Trade"
-            }
-            
-            # Add to chat logs using vector_store
-            vector_store.add_chat_log(chat_log_data)
-            
-        return {"status": "success", "message": f"Added 5 sample chat logs for agent {agent_id}"}
-    except Exception as e:
-        logger.error(f"Error adding sample chat logs: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+    if not agent_id:
+        # Get the first agent in the database
+        agents = await _run(agent_engine.get_agents)
+        if not agents:
+            raise HTTPException(status_code=404, detail="No agents found")
+        agent_id = str(agents[0].id)
+    
+    # Create sample chat logs
+    timestamp = datetime.utcnow().isoformat()
+    chat_logs = []
+    for i in range(1, 6):
+        chat_logs.append({
+            "agent_id": str(agent_id),
+            "request_message": f"Test request {i}",
+            "response_message": f"Test response {i}",
+            "input_tokens": 100 * i,
+            "output_tokens": 50 * i,
+            "total_tokens": 150 * i,
+            "requestor_id": "test-user",
+            "model_name": "gpt-4-turbo-preview",
+            "duration_ms": 1000 * i,
+            "status": "success",
+            "temperature": 0.7,
+            "max_tokens": "4000",
+            "cost": 0.001 * i,
+            "timestamp": timestamp,
+            "tool_calls": "[]",
+            "has_tool_calls": "false",
+            "memory_summary": "",
+            "has_memory": "false",
+            "user": "Administrator",
+            "department": "Post Trade"
+        })
+    
+    # Add all chat logs in a single vector store write
+    await _run(vector_store.add_chat_logs_batch, chat_logs)
+    
+    return {"status": "success", "message": f"Added 5 sample chat logs for agent {agent_id}"}
\ No newline at end of file
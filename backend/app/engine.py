@@ -1,38 +1,76 @@
-from typing import Dict, Any, List, TypedDict, Annotated, Optional, Tuple
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, List, Set, TypedDict, Annotated, Optional, Tuple
 from langgraph.graph import StateGraph
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain.schema import BaseMessage
 from .models import Agent, AgentStatus
 from .tools import tool_registry
-import chromadb
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+import orjson
 import os
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import HumanMessage, SystemMessage, AIMessage
-from langchain.tools import Tool
+from langchain.tools import BaseTool, Tool
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain_core.agents import AgentFinish
 from langchain_core.messages import FunctionMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.memory import ConversationSummaryBufferMemory
 from app.models import AgentCreate, AgentUpdate, ChatMessage
-from app.vector_store import VectorStore
-from app.config import Settings
+from app.vector_store import CHAT_LOG_EMBEDDING, to_epoch, vector_store
+from app.agent_store import AgentStore
+from app.chat_log_writer import ChatLogWriter
+from app.agent_writer import AgentWriter
+from app.config import get_settings
 import logging
 import time
-from langchain.callbacks import get_openai_callback
+from langchain_community.callbacks.openai_info import OpenAICallbackHandler
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
+import asyncio
+import functools
+import threading
 import uuid
 
 logger = logging.getLogger(__name__)
 
 # Load settings
-settings = Settings()
+settings = get_settings()
 
-# Set tokenizers parallelism before initializing memory
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
+# Agent timestamps are naive UTC datetimes, stored as integer microseconds since this epoch
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_epoch_us(value: datetime) -> int:
+    """Convert a naive UTC datetime to integer microseconds since the Unix epoch."""
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+def _dump_json(value: Any) -> str:
+    """Serialize a stored JSON field such as an agent's context."""
+    return orjson.dumps(value).decode()
+
+def _from_stored_time(value: Any) -> datetime:
+    """Convert a stored agent timestamp back to a naive UTC datetime.
+    
+    Agents stored before timestamps became integers hold ISO 8601 strings.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return _EPOCH + timedelta(microseconds=value)
+
+@functools.lru_cache(maxsize=settings.WORKFLOW_CACHE_SIZE)
+def _chat_prompt(system_template: str) -> ChatPromptTemplate:
+    """Build the prompt used by workflows and chat agents for a system message.
+    
+    Agents with the same system message, e.g. ones created from a shared template,
+    get the same prompt object, so it must not be modified.
+    """
+    return ChatPromptTemplate.from_messages([
+        ("system", system_template),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
 
 class AgentState(TypedDict):
     messages: List[BaseMessage]
@@ -40,92 +78,161 @@ class AgentState(TypedDict):
     input: str
     tools: Dict[str, Any]
 
-class TokenUsageCallback:
+class TokenQueueCallback(AsyncCallbackHandler):
+    """Collects streamed LLM tokens into an asyncio queue, ending with None once the reply is complete."""
+    
     def __init__(self):
-        self.prompt_tokens = 0
-        self.completion_tokens = 0
-        self.total_tokens = 0
-        self.total_cost = 0.0
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
-
-    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
-        """Run when LLM starts running."""
-        pass
-
-    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
-        """Run when LLM ends running."""
-        if hasattr(response, 'usage'):
-            usage = response.usage
-            self.prompt_tokens += getattr(usage, 'prompt_tokens', 0)
-            self.completion_tokens += getattr(usage, 'completion_tokens', 0)
-            self.total_tokens += getattr(usage, 'total_tokens', 0)
-            self.total_cost += getattr(usage, 'total_cost', 0.0)
-        # Handle different response types
-        elif isinstance(response, dict) and 'usage' in response:
-            usage = response['usage']
-            self.prompt_tokens += usage.get('prompt_tokens', 0)
-            self.completion_tokens += usage.get('completion_tokens', 0)
-            self.total_tokens += usage.get('total_tokens', 0)
-            self.total_cost += usage.get('total_cost', 0.0)
-
-    def on_llm_error(self, error: Exception, **kwargs: Any) -> None:
-        """Run when LLM errors."""
-        logger.error(f"LLM error: {error}")
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        # Function-call chunks carry no text
+        if token:
+            await self.queue.put(token)
+
+    async def on_chain_end(self, outputs: Dict[str, Any], *, parent_run_id: Optional[uuid.UUID] = None, **kwargs: Any) -> None:
+        # The outermost chain is the agent executor; it ends before the turn is saved
+        if parent_run_id is None:
+            await self.queue.put(None)
+
+class AgentNotFoundError(LookupError):
+    """Raised when an agent ID does not match any stored agent."""
+
+    def __init__(self, agent_id: str):
+        super().__init__(f"Agent {agent_id} not found")
+        self.agent_id = agent_id
+
+class InvalidAgentStateError(ValueError):
+    """Raised when an agent is not in a status that allows the requested change."""
 
 class AgentEngine:
     def __init__(self):
         self._active_agents: Dict[str, Dict[str, Any]] = {}
+        # Guards check-and-set changes to _active_agents and its entries; reads of a single entry are lock-free
+        self._active_agents_lock = threading.Lock()
+        # agent_id -> (expiry time, agent); written through on every change made here
+        self._agent_cache: Dict[str, Tuple[float, Agent]] = {}
+        self._agent_cache_lock = threading.Lock()
+        # Orders single-field writes against deletes (see _patch_record) and makes chat
+        # history updates read-modify-write; reentrant so those can call _patch_record
+        self._record_lock = threading.RLock()
+        # True while the agent cache holds every stored agent, so a cache miss means no such agent
+        self._agent_cache_complete = False
+        # (agent_id, stored updated_at) -> agent built from that record, shared by agent listings
+        self._listed_agents: Dict[Tuple[str, str], Agent] = {}
+        self._listed_agents_lock = threading.Lock()
+        # agent_id -> (signature of the prompt and tools it was built from, workflow)
+        self._workflow_cache: Dict[str, Tuple[Tuple[Any, ...], StateGraph]] = {}
+        self._workflow_cache_lock = threading.Lock()
+        # (agent_id, streaming) -> (signature of the prompt and tools it was built from, chat agent runnable)
+        self._chat_agent_cache: Dict[Tuple[str, bool], Tuple[Tuple[Any, ...], Any]] = {}
+        # Streamed chat turns still being saved after their reply was sent
+        self._chat_tasks: Set[asyncio.Task] = set()
+        # Chat logs are written in batches off the reply path
+        self.chat_log_writer = ChatLogWriter(
+            self.add_chat_logs,
+            queue_size=settings.CHAT_LOG_QUEUE_SIZE,
+            batch_size=settings.CHAT_LOG_BATCH_SIZE,
+            flush_interval=settings.CHAT_LOG_FLUSH_MS / 1000
+        )
+        # Share the process-wide vector store rather than opening a second client
+        self.vector_store = vector_store
         self._initialize_db()
-        self.vector_store = VectorStore()
-        
-        # Initialize LLM with settings
+        self.tool_registry = tool_registry
+
+    @functools.cached_property
+    def llm(self) -> ChatOpenAI:
+        """The chat model, built on first use so that starting the app does not create API clients."""
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
             
-        self.llm = ChatOpenAI(
+        llm = ChatOpenAI(
             model=settings.OPENAI_MODEL,
             temperature=settings.OPENAI_TEMPERATURE,
             max_tokens=settings.OPENAI_MAX_TOKENS,
             api_key=api_key
         )
-        logger.info(f"Initialized LLM with model: {settings.OPENAI_MODEL}")
-        
-        self.tool_registry = tool_registry
+        logger.info("Initialized LLM with model: %s", settings.OPENAI_MODEL)
+        return llm
+
+    @functools.cached_property
+    def _llm_log_fields(self) -> Dict[str, str]:
+        """The chat log fields describing the chat model, which never change once it is built."""
+        return {
+            "model_name": str(self.llm.model_name),
+            "temperature": str(self.llm.temperature),
+            "max_tokens": str(self.llm.max_tokens) if self.llm.max_tokens else "none"
+        }
 
     def _initialize_db(self):
-        """Initialize ChromaDB for agent storage."""
+        """Initialize the agent store and the ChromaDB chat log collection."""
         try:
-            persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
-            os.makedirs(persist_directory, exist_ok=True)
+            # The vector store's client and chat log collection, so both see the same writes
+            self.client = self.vector_store.client
+            self.chat_logs = self.vector_store.chat_logs_collection
             
-            # Initialize ChromaDB client with logging
-            logger.info(f"Initializing ChromaDB with persist directory: {persist_directory}")
-            self.client = chromadb.PersistentClient(path=persist_directory)
-            
-            # Create or get collection with explicit schema
-            self.collection = self.client.get_or_create_collection(
-                name="agents",
-                metadata={"hnsw:space": "cosine"}
-            )
-            
-            # Create chat logs collection
-            self.chat_logs = self.client.get_or_create_collection(
-                name="chat_logs",
-                metadata={"hnsw:space": "cosine"}
-            )
+            # Agents are only looked up by ID, so they live in a SQL table rather than ChromaDB
+            self.store = AgentStore(settings.DATABASE_URL)
+            # Agent creates and updates from concurrent requests share upserts
+            self._writer = AgentWriter(self.store, batch_size=settings.AGENT_WRITE_BATCH_SIZE)
+            if self.store.count() == 0:
+                self._import_chroma_agents()
             
             logger.info("ChromaDB collections initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize ChromaDB: {str(e)}")
+            logger.error("Failed to initialize ChromaDB: %s", e)
             raise
 
+    def _import_chroma_agents(self) -> None:
+        """Copy agents stored in the ChromaDB "agents" collection into the empty agent store.
+        
+        The collection is left untouched; it also holds the vector store's documents.
+        """
+        try:
+            collection = self.client.get_collection("agents")
+        except Exception:
+            return
+        
+        # Documents share the collection but have no agent status
+        results = collection.get(
+            where={"status": {"$in": [status.value for status in AgentStatus]}},
+            include=["metadatas"]
+        )
+        records = []
+        for metadata in results["metadatas"]:
+            try:
+                records.append(self._agent_to_dict(self._dict_to_agent(metadata)))
+            except ValueError:
+                continue
+        self.store.upsert(records)
+        if records:
+            logger.info("Imported %s agents from ChromaDB into the agent store", len(records))
+
+    def _cache_agent(self, agent: Agent) -> None:
+        """Store a private copy of an agent in the lookup cache."""
+        ttl = settings.AGENT_CACHE_TTL
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+        with self._agent_cache_lock:
+            self._agent_cache.pop(str(agent.id), None)
+            if len(self._agent_cache) >= settings.AGENT_CACHE_SIZE:
+                # Evict the oldest entry
+                self._agent_cache.pop(next(iter(self._agent_cache)))
+                self._agent_cache_complete = False
+            self._agent_cache[str(agent.id)] = (expires_at, agent.model_copy(deep=True))
+
+    def _invalidate_agent(self, agent_id: str) -> None:
+        """Drop an agent from the lookup cache."""
+        with self._agent_cache_lock:
+            self._agent_cache.pop(str(agent_id), None)
+
+    def _invalidate_workflow(self, agent_id: str) -> None:
+        """Drop an agent's workflow and chat agents from their caches."""
+        with self._workflow_cache_lock:
+            self._workflow_cache.pop(str(agent_id), None)
+            for streaming in (False, True):
+                self._chat_agent_cache.pop((str(agent_id), streaming), None)
+
     def _serialize_metadata(self, data: Dict[str, Any]) -> Dict[str, str]:
         """
         Ensure all metadata values are strings for ChromaDB.
@@ -162,101 +269,207 @@ class AgentEngine:
                 
         return serialized
 
-    def _agent_to_dict(self, agent: Agent) -> Dict[str, Any]:
-        """Convert an Agent object to a dictionary for storage."""
+    # Converts each agent field to the form stored in its agent store column
+    _STORED_FIELDS: Dict[str, Callable[[Agent], Any]] = {
+        "id": lambda agent: str(agent.id),
+        "name": lambda agent: agent.name,
+        "description": lambda agent: agent.description,
+        "prompt": lambda agent: agent.prompt,
+        "tools": lambda agent: ",".join(agent.tools),
+        "hitl_enabled": lambda agent: agent.hitl_enabled,
+        "status": lambda agent: agent.status.value,
+        "created_at": lambda agent: _to_epoch_us(agent.created_at),
+        "updated_at": lambda agent: _to_epoch_us(agent.updated_at),
+        "context": lambda agent: _dump_json(agent.context) if getattr(agent, "context", None) else "{}"
+    }
+
+    def _agent_to_dict(self, agent: Agent, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Convert an Agent object to a dictionary for storage.
+        
+        Matches the columns of the agent store: tool names are joined with commas,
+        timestamps are integer microseconds and only the free-form context is JSON.
+        
+        Args:
+            agent (Agent): The agent to convert
+            fields (Optional[Iterable[str]]): Convert only these fields, ignoring names
+                that are not stored; all of them when not given
+        """
         try:
+            if fields is None:
+                fields = self._STORED_FIELDS
             agent_dict = {
-                "id": str(agent.id),
-                "name": agent.name,
-                "description": agent.description,
-                "prompt": agent.prompt,
-                "tools": json.dumps(agent.tools),
-                "hitl_enabled": str(agent.hitl_enabled).lower(),
-                "status": agent.status.value.upper(),
-                "created_at": agent.created_at.isoformat(),
-                "updated_at": agent.updated_at.isoformat(),
-                "context": json.dumps(agent.context) if hasattr(agent, 'context') and agent.context else "{}"
+                field: self._STORED_FIELDS[field](agent)
+                for field in fields if field in self._STORED_FIELDS
             }
-            # Ensure all values are strings
-            agent_dict = self._serialize_metadata(agent_dict)
-            logger.debug(f"Converted agent to dict: {agent_dict}")
+            logger.debug("Converted agent to dict: %s", agent_dict)
             return agent_dict
         except Exception as e:
-            logger.error(f"Failed to convert agent to dictionary: {str(e)}")
+            logger.error("Failed to convert agent to dictionary: %s", e)
             raise ValueError(f"Failed to convert agent to dictionary: {str(e)}")
 
     def _dict_to_agent(self, data: Dict[str, Any]) -> Agent:
-        """Convert a dictionary to an Agent object."""
+        """Convert a dictionary to an Agent object.
+        
+        Also reads agents stored in ChromaDB before native metadata types were used,
+        whose tools are a JSON list and whose other fields are all strings.
+        """
         try:
-            # Convert string values back to appropriate types
+            tools = data["tools"]
+            if tools.startswith("["):
+                tools = orjson.loads(tools)
+            else:
+                tools = tools.split(",") if tools else []
             agent_data = {
                 "id": data["id"],
                 "name": data["name"],
                 "description": data["description"],
                 "prompt": data["prompt"],
-                "tools": json.loads(data["tools"]),
-                "hitl_enabled": data["hitl_enabled"] == "true",
-                "status": AgentStatus(data["status"].upper()),
-                "created_at": datetime.fromisoformat(data["created_at"]),
-                "updated_at": datetime.fromisoformat(data["updated_at"]),
-                "context": json.loads(data.get("context", "{}"))
+                "tools": tools,
+                "hitl_enabled": data["hitl_enabled"] in (True, "true"),
+                "status": AgentStatus(data["status"]),
+                "created_at": _from_stored_time(data["created_at"]),
+                "updated_at": _from_stored_time(data["updated_at"]),
+                "context": orjson.loads(data.get("context", "{}"))
             }
-            logger.debug(f"Converting dict to agent: {agent_data}")
+            logger.debug("Converting dict to agent: %s", agent_data)
             return Agent(**agent_data)
         except Exception as e:
-            logger.error(f"Failed to convert dictionary to agent: {str(e)}")
+            logger.error("Failed to convert dictionary to agent: %s", e)
             raise ValueError(f"Failed to convert dictionary to agent: {str(e)}")
 
+    def _listed_agent(self, data: Dict[str, Any]) -> Agent:
+        """Convert a stored agent record to an Agent, reusing the last conversion of the same record.
+        
+        Every change to an agent bumps its updated_at, so an unchanged updated_at means
+        an unchanged record and the cached Agent can be returned as is.
+        """
+        key = (data["id"], data["updated_at"])
+        with self._listed_agents_lock:
+            agent = self._listed_agents.get(key)
+            if agent is not None:
+                return agent
+        
+        agent = self._dict_to_agent(data)
+        with self._listed_agents_lock:
+            if len(self._listed_agents) >= settings.AGENT_CACHE_SIZE:
+                # Evict the oldest entry
+                self._listed_agents.pop(next(iter(self._listed_agents)))
+            self._listed_agents[key] = agent
+        return agent
+
     def create_agent(self, agent: Agent) -> Agent:
-        """Create a new agent and store it in ChromaDB."""
+        """Create a new agent and store it in the agent store."""
         # Initialize context if not present
         if not hasattr(agent, 'context') or not agent.context:
             agent.context = {
                 "chat_history": [],
-                "created_at": datetime.utcnow().isoformat()
+                "created_at": agent.created_at.isoformat()
             }
         
         agent_dict = self._agent_to_dict(agent)
-        self.collection.add(
-            ids=[str(agent.id)],  # Convert UUID to string
-            documents=[agent.description],
-            metadatas=[agent_dict]
-        )
+        self._writer.write(str(agent.id), agent_dict)
+        self._cache_agent(agent)
         return agent
 
-    def get_agents(self) -> List[Agent]:
-        """Get all agents from ChromaDB."""
+    def get_agents(self, limit: Optional[int] = None, offset: int = 0) -> List[Agent]:
+        """Get agents from the agent store, all of them unless limit is given.
+        
+        Agents whose stored record has not changed since the last listing are reused
+        rather than rebuilt, so the returned agents are shared and must not be modified.
+        While the agent cache holds every stored agent, the listing is served from it.
+        """
+        if self._agent_cache_complete:
+            with self._agent_cache_lock:
+                cached = [agent for _, agent in self._agent_cache.values()]
+            # Same order as the agent store's listing
+            cached.sort(key=lambda agent: (agent.created_at, str(agent.id)))
+            return cached[offset:None if limit is None else offset + limit]
+        
         try:
-            results = self.collection.get()
-            if not results["metadatas"]:
-                logger.info("No agents found in collection")
+            records = self.store.list(limit=limit, offset=offset)
+            if not records:
+                logger.info("No agents found in the agent store")
                 return []
             
             agents = []
-            for metadata in results["metadatas"]:
+            for record in records:
                 try:
-                    agent = self._dict_to_agent(metadata)
+                    agent = self._listed_agent(record)
                     agents.append(agent)
                 except Exception as e:
-                    logger.error(f"Failed to convert agent metadata: {str(e)}")
+                    logger.error("Failed to convert agent record: %s", e)
                     continue
             
-            logger.info(f"Successfully retrieved {len(agents)} agents")
+            logger.info("Successfully retrieved %s agents", len(agents))
             return agents
             
         except Exception as e:
-            logger.error(f"Error retrieving agents: {str(e)}")
+            logger.error("Error retrieving agents: %s", e)
             raise
 
+    def preload_agents(self) -> int:
+        """Load stored agents into the agent cache so their first lookups skip the agent store.
+        
+        Loads at most AGENT_CACHE_SIZE agents. When every stored agent fits and cached
+        agents never expire, lookups of unknown IDs are answered from memory too.
+        
+        Returns:
+            int: The number of agents loaded
+        """
+        stored = self.store.count()
+        agents = self.get_agents(limit=settings.AGENT_CACHE_SIZE)
+        for agent in agents:
+            self._cache_agent(agent)
+        self._agent_cache_complete = (
+            settings.AGENT_CACHE_TTL is None and stored <= settings.AGENT_CACHE_SIZE
+        )
+        logger.info("Preloaded %s agents into the agent cache", len(agents))
+        return len(agents)
+
     def get_agent(self, agent_id: str) -> Optional[Agent]:
-        """Get a specific agent by ID from ChromaDB."""
-        results = self.collection.get(ids=[str(agent_id)])  # Ensure ID is string
-        if not results["ids"]:
+        """Get a specific agent by ID, served from the in-memory agent cache when present.
+        
+        Callers get their own copy and may modify it freely.
+        """
+        agent_id = str(agent_id)  # Ensure ID is string
+        entry = self._agent_cache.get(agent_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1].model_copy(deep=True)
+        if self._agent_cache_complete:
+            return None
+        
+        record = self.store.get(agent_id)
+        if record is None:
+            self._invalidate_agent(agent_id)
             return None
-        return self._dict_to_agent(results["metadatas"][0])
+        agent = self._dict_to_agent(record)
+        self._cache_agent(agent)
+        return agent
+
+    async def aget_agent(self, agent_id: str) -> Optional[Agent]:
+        """Get a specific agent by ID without blocking the event loop on the agent store.
+        
+        Agents in the agent cache are returned directly; only lookups that have to
+        read the agent store run on a worker thread.
+        """
+        entry = self._agent_cache.get(str(agent_id))
+        if (entry and entry[0] > time.monotonic()) or self._agent_cache_complete:
+            return self.get_agent(agent_id)
+        return await asyncio.to_thread(self.get_agent, agent_id)
+
+    def get_or_raise(self, agent_id: str) -> Agent:
+        """Get a specific agent by ID.
+        
+        Raises:
+            AgentNotFoundError: If no agent has this ID
+        """
+        agent = self.get_agent(agent_id)
+        if agent is None:
+            raise AgentNotFoundError(str(agent_id))
+        return agent
 
     def update_agent(self, agent_id: str, agent_update: Dict[str, Any]) -> Optional[Agent]:
-        """Update an agent in ChromaDB."""
+        """Update an agent in the agent store."""
         agent = self.get_agent(agent_id)
         if not agent:
             return None
@@ -276,44 +489,147 @@ class AgentEngine:
             if "status" in agent_update:
                 agent.status = agent_update["status"]
             
-            agent.updated_at = datetime.utcnow()
-            
-            # Store updated agent
-            agent_dict = self._agent_to_dict(agent)
-            self.collection.update(
-                ids=[agent_id],
-                documents=[agent.description],
-                metadatas=[agent_dict]
-            )
+            # Store only the updated fields; the context in particular can be large
+            # and is left as it is
+            stored = self._agent_to_dict(agent, fields=agent_update.keys())
+            if not self._patch_record(agent, stored):
+                return None
+            self._invalidate_workflow(agent_id)
             
-            logger.info(f"Successfully updated agent {agent_id}")
+            logger.info("Successfully updated agent %s", agent_id)
             return agent
             
         except Exception as e:
-            logger.error(f"Failed to update agent {agent_id}: {str(e)}")
+            logger.error("Failed to update agent %s: %s", agent_id, e)
             raise ValueError(f"Failed to update agent: {str(e)}")
 
+    def transition_status(self, agent_id: str, new_status: AgentStatus) -> Optional[Agent]:
+        """Set an agent's status, writing only the changed columns.
+        
+        Args:
+            agent_id (str): The agent to update
+            new_status (AgentStatus): The status to set
+            
+        Returns:
+            Optional[Agent]: The updated agent, or None if it does not exist
+        """
+        agent_id = str(agent_id)
+        # Served from the agent cache in the common case, so only the write hits the agent store
+        agent = self.get_agent(agent_id)
+        if agent is None:
+            return None
+        
+        agent.status = new_status
+        if not self._patch_record(agent, {"status": new_status.value}):
+            return None
+        logger.info("Agent %s status set to %s", agent_id, new_status.value)
+        return agent
+
+    def update_context(self, agent_id: str, context: Dict[str, Any]) -> Optional[Agent]:
+        """Replace an agent's context, writing only the changed columns.
+        
+        Args:
+            agent_id (str): The agent to update
+            context (Dict[str, Any]): The new context
+            
+        Returns:
+            Optional[Agent]: The updated agent, or None if it does not exist
+        """
+        agent_id = str(agent_id)
+        agent = self.get_agent(agent_id)
+        if agent is None:
+            return None
+        
+        agent.context = context
+        if not self._patch_record(agent, {"context": _dump_json(context)}):
+            return None
+        return agent
+
+    def _patch_record(self, agent: Agent, values: Dict[str, Any]) -> bool:
+        """Write some of an agent's stored fields, bumping updated_at, and re-cache the agent.
+        
+        Args:
+            agent (Agent): The agent, already carrying the new field values
+            values (Dict[str, Any]): The stored form of the changed fields
+            
+        Returns:
+            bool: False if the agent was deleted in the meantime; it is then dropped
+                from the cache rather than re-cached
+        """
+        agent.updated_at = datetime.utcnow()
+        # Held across the write and the cache update so a concurrent delete cannot
+        # land in between and have its invalidation undone
+        with self._record_lock:
+            if not self.store.update(str(agent.id), {**values, "updated_at": _to_epoch_us(agent.updated_at)}):
+                self._invalidate_agent(agent.id)
+                return False
+            self._cache_agent(agent)
+        return True
+
     def delete_agent(self, agent_id: str) -> bool:
-        """Delete an agent and clean up its resources."""
+        """Delete an agent and clean up its resources.
+        
+        Raises:
+            AgentNotFoundError: If no agent has this ID
+        """
         agent_id = str(agent_id)
+        # Stop the agent if it is active in this process
+        with self._active_agents_lock:
+            agent_state = self._active_agents.pop(agent_id, None)
+        if agent_state is None and self.get_agent(agent_id) is None:
+            raise AgentNotFoundError(agent_id)
+        
         try:
-            # Clean up active agent if running
-            if agent_id in self._active_agents:
-                self.pause_agent(agent_id)
-                del self._active_agents[agent_id]
-            
             # Delete from database
-            self.collection.delete(ids=[agent_id])
+            with self._record_lock:
+                self.store.delete(agent_id)
+                self._invalidate_agent(agent_id)
+            self._invalidate_workflow(agent_id)
             
-            logger.info(f"Agent {agent_id} deleted successfully")
+            logger.info("Agent %s deleted successfully", agent_id)
             return True
         except Exception as e:
-            logger.error(f"Failed to delete agent {agent_id}: {str(e)}")
+            logger.error("Failed to delete agent %s: %s", agent_id, e)
             return False
 
-    def create_workflow(self, agent: Agent) -> StateGraph:
-        """Create a LangGraph workflow for the agent."""
+    def _get_workflow(self, agent: Agent, tools: List[BaseTool]) -> StateGraph:
+        """Get a workflow for the agent, reusing the last one built from the same prompt and tools.
+        
+        Workflows are never modified after they are built, so running agents can share them.
+        
+        Args:
+            agent (Agent): The agent to get a workflow for
+            tools (List[BaseTool]): The agent's resolved tools
+        """
+        agent_id = str(agent.id)
+        # Tools are identified by object so re-registering a tool under the same name rebuilds
+        signature = (agent.prompt, tuple(id(tool) for tool in tools))
+        with self._workflow_cache_lock:
+            entry = self._workflow_cache.get(agent_id)
+        if entry and entry[0] == signature:
+            return entry[1]
+        
+        workflow = self.create_workflow(agent, tools)
+        with self._workflow_cache_lock:
+            self._workflow_cache.pop(agent_id, None)
+            if len(self._workflow_cache) >= settings.WORKFLOW_CACHE_SIZE:
+                # Evict the oldest entry
+                self._workflow_cache.pop(next(iter(self._workflow_cache)))
+            self._workflow_cache[agent_id] = (signature, workflow)
+        return workflow
+
+    def create_workflow(self, agent: Agent, tools: Optional[List[BaseTool]] = None) -> StateGraph:
+        """Create a LangGraph workflow for the agent.
+        
+        Args:
+            agent (Agent): The agent to create a workflow for
+            tools (Optional[List[BaseTool]]): The agent's resolved tools, looked up
+                from the registry when not given
+        """
         try:
+            if tools is None:
+                tools = self.tool_registry.get_tools(agent.tools)
+            
             # Create the base prompt template with agent's prompt
             system_template = agent.prompt
             
@@ -321,22 +637,11 @@ class AgentEngine:
             if "agent_scratchpad" not in system_template and "tool" in system_template.lower():
                 # Add minimal instructions for tool usage if needed
                 system_template += "\n\nYou have access to the following tools:\n"
-                tools = []
-                for tool_name in agent.tools:
-                    try:
-                        tool = self.tool_registry.get_tool(tool_name)
-                        tools.append(tool)
-                        system_template += f"\n- {tool.name}: {tool.description}"
-                    except ValueError as e:
-                        logger.warning(f"Tool {tool_name} not found: {str(e)}")
+                for tool in tools:
+                    system_template += f"\n- {tool.name}: {tool.description}"
 
             # Create the prompt template
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_template),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad"),
-            ])
+            prompt = _chat_prompt(system_template)
 
             # Create the chain using the new RunnableSequence pattern
             chain = prompt | self.llm
@@ -344,37 +649,17 @@ class AgentEngine:
             # Create the graph
             workflow = StateGraph(AgentState)
 
-            # Initialize the state
-            initial_state = {
-                "messages": [],
-                "current_step": "main",
-                "input": "",
-                "tools": {}
-            }
-
             # Add nodes for each tool
-            available_tools = {}
-            for tool_name in agent.tools:
-                try:
-                    tool = self.tool_registry.get_tool(tool_name)
-                    available_tools[tool_name] = tool
-                    workflow.add_node(
-                        tool_name,
-                        lambda state, t=tool: self._run_tool(state, t)
-                    )
-                except ValueError as e:
-                    logger.warning(f"Tool {tool_name} not found: {str(e)}")
+            for tool in tools:
+                workflow.add_node(tool.name, functools.partial(self._run_tool, tool=tool))
 
             # Add the main chain node
-            workflow.add_node(
-                "main",
-                lambda state: self._run_chain(state, chain)
-            )
+            workflow.add_node("main", functools.partial(self._run_chain, chain=chain))
 
             return workflow
 
         except Exception as e:
-            logger.error(f"Error creating workflow: {str(e)}")
+            logger.error("Error creating workflow: %s", e)
             raise ValueError(f"Failed to create workflow: {str(e)}")
 
     def _run_tool(self, state: AgentState, tool: Tool) -> AgentState:
@@ -387,7 +672,7 @@ class AgentEngine:
             state["current_step"] = "main"
             return state
         except Exception as e:
-            logger.error(f"Error running tool: {str(e)}")
+            logger.error("Error running tool: %s", e)
             state["messages"].append(AIMessage(content=f"Error running tool: {str(e)}"))
             state["current_step"] = "main"
             return state
@@ -395,10 +680,12 @@ class AgentEngine:
     def _run_chain(self, state: AgentState, chain) -> AgentState:
         """Run the chain and update the state."""
         try:
-            # Prepare the input for the chain
+            # The prompt takes the history as messages, so pass them as they are
+            # rather than joining them into one string on every step
             chain_input = {
                 "input": state["input"],
-                "chat_history": "\n".join([msg.content for msg in state["messages"]])
+                "chat_history": state["messages"],
+                "agent_scratchpad": []
             }
             
             # Run the chain
@@ -409,135 +696,146 @@ class AgentEngine:
             state["current_step"] = "main"
             return state
         except Exception as e:
-            logger.error(f"Error running chain: {str(e)}")
+            logger.error("Error running chain: %s", e)
             state["messages"].append(AIMessage(content=f"Error: {str(e)}"))
             state["current_step"] = "main"
             return state
 
+    def is_running(self, agent_id: str) -> bool:
+        """Check whether an agent's workflow is active in this process."""
+        return str(agent_id) in self._active_agents
+
     def start_agent(self, agent: Agent) -> None:
         """Start an agent's workflow."""
         agent_id = str(agent.id)
         if agent_id in self._active_agents:
-            raise ValueError(f"Agent {agent_id} is already running")
+            raise InvalidAgentStateError(f"Agent {agent_id} is already running")
 
         try:
+            # Resolve the tools once for both the workflow and the state; a missing tool fails the start
+            tools = [self.tool_registry.get_tool(name) for name in agent.tools]
+            
             # Create and initialize the workflow
-            workflow = self.create_workflow(agent)
+            workflow = self._get_workflow(agent, tools)
             
             # Initialize the agent state
             initial_state = {
                 "messages": [],
                 "current_step": "main",
                 "input": "",
-                "tools": {
-                    name: self.tool_registry.get_tool(name)
-                    for name in agent.tools
-                }
+                "tools": {tool.name: tool for tool in tools}
             }
-            
-            # Store the active agent
+        except Exception as e:
+            logger.error("Failed to start agent %s: %s", agent_id, e)
+            # Update agent status to failed in database
+            self.transition_status(agent_id, AgentStatus.FAILED)
+            raise ValueError(f"Failed to start agent: {str(e)}")
+
+        # Store the active agent; the workflow was built outside the lock, so check again
+        with self._active_agents_lock:
+            if agent_id in self._active_agents:
+                raise InvalidAgentStateError(f"Agent {agent_id} is already running")
             self._active_agents[agent_id] = {
                 "workflow": workflow,
                 "state": initial_state,
                 "status": AgentStatus.RUNNING,
                 "agent": agent
             }
-            
-            logger.info(f"Agent {agent_id} started successfully")
-            
-            # Update agent status in database
-            self.update_agent(agent_id, {"status": AgentStatus.RUNNING})
-            
-        except Exception as e:
-            logger.error(f"Failed to start agent {agent_id}: {str(e)}")
-            # Update agent status to failed in database
-            self.update_agent(agent_id, {"status": AgentStatus.FAILED})
-            raise ValueError(f"Failed to start agent: {str(e)}")
+        
+        logger.info("Agent %s started successfully", agent_id)
+        
+        # Update agent status in database
+        self.transition_status(agent_id, AgentStatus.RUNNING)
+
+    async def astart_agent(self, agent: Agent) -> None:
+        """Start an agent's workflow without blocking the event loop."""
+        await asyncio.to_thread(self.start_agent, agent)
 
     def pause_agent(self, agent_id: str) -> None:
         """Pause a running agent."""
         agent_id = str(agent_id)
         
-        if agent_id in self._active_agents:
+        agent_state = self._active_agents.get(agent_id)
+        if agent_state is not None:
             # Agent is actively running in memory
             try:
-                agent_state = self._active_agents[agent_id]
-                if agent_state["status"] == AgentStatus.RUNNING:
-                    agent_state["status"] = AgentStatus.PAUSED
-                    logger.info(f"Agent {agent_id} paused in memory")
-                    # Note: DB status is updated by the endpoint after this call succeeds
+                with self._active_agents_lock:
+                    previous_status = agent_state["status"]
+                    if previous_status == AgentStatus.RUNNING:
+                        agent_state["status"] = AgentStatus.PAUSED
+                if previous_status == AgentStatus.RUNNING:
+                    self.transition_status(agent_id, AgentStatus.PAUSED)
+                    logger.info("Agent %s paused", agent_id)
                 else:
-                    logger.warning(f"Agent {agent_id} is in active list but not RUNNING (Status: {agent_state['status']}). Cannot pause.")
+                    logger.warning("Agent %s is in active list but not RUNNING (Status: %s). Cannot pause.", agent_id, previous_status)
                     # Optionally raise an error here if this state is unexpected
             except Exception as e:
-                logger.error(f"Error pausing agent {agent_id} in memory: {str(e)}")
+                logger.error("Error pausing agent %s in memory: %s", agent_id, e)
                 raise ValueError(f"Failed to pause agent {agent_id}: {str(e)}")
         else:
             # Agent is not in the active memory dictionary (possibly due to restart)
             # Check the database status
-            logger.warning(f"Agent {agent_id} not found in active agents list. Checking database status.")
-            agent = self.get_agent(agent_id)
-            if not agent:
-                raise ValueError(f"Agent {agent_id} not found in database")
+            logger.warning("Agent %s not found in active agents list. Checking database status.", agent_id)
+            agent = self.get_or_raise(agent_id)
 
             if agent.status == AgentStatus.RUNNING:
                 # If DB says running, update DB status directly to PAUSED
-                logger.info(f"Agent {agent_id} found running in DB but not active. Setting status to PAUSED in DB.")
-                self.update_agent(agent_id, {"status": AgentStatus.PAUSED})
+                logger.info("Agent %s found running in DB but not active. Setting status to PAUSED in DB.", agent_id)
+                self.transition_status(agent_id, AgentStatus.PAUSED)
             elif agent.status == AgentStatus.PAUSED:
-                logger.info(f"Agent {agent_id} is already PAUSED in the database.")
+                logger.info("Agent %s is already PAUSED in the database.", agent_id)
             else:
                 # Agent exists but is IDLE in DB, cannot pause
-                logger.warning(f"Agent {agent_id} found in DB but status is {agent.status}. Cannot pause.")
-                raise ValueError(f"Agent {agent_id} is not running (status: {agent.status})")
+                logger.warning("Agent %s found in DB but status is %s. Cannot pause.", agent_id, agent.status)
+                raise InvalidAgentStateError(f"Agent {agent_id} is not running (status: {agent.status})")
 
     def resume_agent(self, agent_id: str) -> None:
         """Resume a paused agent."""
         agent_id = str(agent_id)
-        if agent_id not in self._active_agents:
-            raise ValueError(f"Agent {agent_id} is not active")
-
-        agent_state = self._active_agents[agent_id]
-        if agent_state["status"] != AgentStatus.PAUSED:
-            raise ValueError(f"Agent {agent_id} is not paused")
+        agent_state = self._active_agents.get(agent_id)
+        if agent_state is None:
+            self.get_or_raise(agent_id)
+            raise InvalidAgentStateError(f"Agent {agent_id} is not active")
 
-        try:
+        with self._active_agents_lock:
+            if agent_state["status"] != AgentStatus.PAUSED:
+                raise InvalidAgentStateError(f"Agent {agent_id} is not paused")
             # Resume the workflow
             agent_state["status"] = AgentStatus.RUNNING
+
+        try:
+            self.transition_status(agent_id, AgentStatus.RUNNING)
             
-            logger.info(f"Agent {agent_id} resumed successfully")
+            logger.info("Agent %s resumed successfully", agent_id)
         except Exception as e:
-            logger.error(f"Failed to resume agent {agent_id}: {str(e)}")
+            logger.error("Failed to resume agent %s: %s", agent_id, e)
             raise ValueError(f"Failed to resume agent: {str(e)}")
 
     def get_agent_status(self, agent_id: str) -> AgentStatus:
         """Get the current status of an agent."""
         agent_id = str(agent_id)
         # First check active agents
-        if agent_id in self._active_agents:
-            return self._active_agents[agent_id]["status"]
+        agent_state = self._active_agents.get(agent_id)
+        if agent_state is not None:
+            return agent_state["status"]
         
         # If not active, get from database
-        agent = self.get_agent(agent_id)
-        if not agent:
-            raise ValueError(f"Agent {agent_id} not found")
-        
-        return agent.status
+        return self.get_or_raise(agent_id).status
 
     def get_chat_logs(self, start_time: str = None, end_time: str = None, agent_id: str = None) -> List[Dict[str, Any]]:
         """Get chat logs within a time range and/or for a specific agent."""
         try:
             # Build the where clause
-            where_clause = {}
+            conditions = []
             if start_time and end_time:
-                where_clause["timestamp"] = {"$gte": start_time, "$lte": end_time}
+                conditions.append({"ts_epoch": {"$gte": to_epoch(start_time)}})
+                conditions.append({"ts_epoch": {"$lte": to_epoch(end_time)}})
             if agent_id:
-                where_clause["agent_id"] = str(agent_id)
+                conditions.append({"agent_id": str(agent_id)})
+            where_clause = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else None)
 
             # Query the chat logs collection
-            results = self.chat_logs.get(
-                where=where_clause if where_clause else None
-            )
+            results = self.chat_logs.get(where=where_clause)
 
             # Convert results to list of dictionaries with all required fields
             chat_logs = []
@@ -575,56 +873,287 @@ class AgentEngine:
             return chat_logs
 
         except Exception as e:
-            logger.error(f"Error retrieving chat logs: {str(e)}")
+            logger.error("Error retrieving chat logs: %s", e)
             raise
 
     def add_chat_log(self, chat_log_data: Dict[str, Any]) -> None:
         """Add a chat log entry to ChromaDB."""
+        self.add_chat_logs([chat_log_data])
+
+    def add_chat_logs(self, chat_logs: List[Dict[str, Any]]) -> None:
+        """Add several chat log entries to ChromaDB in a single write."""
         try:
-            # Ensure all metadata values are strings
-            metadata = self._serialize_metadata(chat_log_data)
-            
-            # Explicitly convert token counts and cost to strings
-            if "input_tokens" in metadata and not isinstance(metadata["input_tokens"], str):
-                metadata["input_tokens"] = str(metadata["input_tokens"])
-            if "output_tokens" in metadata and not isinstance(metadata["output_tokens"], str):
-                metadata["output_tokens"] = str(metadata["output_tokens"])
-            if "total_tokens" in metadata and not isinstance(metadata["total_tokens"], str):
-                metadata["total_tokens"] = str(metadata["total_tokens"])
-            if "cost" in metadata and not isinstance(metadata["cost"], str):
-                metadata["cost"] = str(metadata["cost"])
+            metadatas = []
+            for chat_log_data in chat_logs:
+                # Ensure all metadata values are strings
+                metadata = self._serialize_metadata(chat_log_data)
+                
+                # Explicitly convert token counts and cost to strings
+                if "input_tokens" in metadata and not isinstance(metadata["input_tokens"], str):
+                    metadata["input_tokens"] = str(metadata["input_tokens"])
+                if "output_tokens" in metadata and not isinstance(metadata["output_tokens"], str):
+                    metadata["output_tokens"] = str(metadata["output_tokens"])
+                if "total_tokens" in metadata and not isinstance(metadata["total_tokens"], str):
+                    metadata["total_tokens"] = str(metadata["total_tokens"])
+                if "cost" in metadata and not isinstance(metadata["cost"], str):
+                    metadata["cost"] = str(metadata["cost"])
+                if metadata.get("timestamp"):
+                    # Numeric copy of the timestamp for time range filters
+                    metadata["ts_epoch"] = to_epoch(metadata["timestamp"])
+                metadatas.append(metadata)
             
             # Add to chat logs collection
             self.chat_logs.add(
-                ids=[str(uuid.uuid4())],
-                documents=[metadata["response_message"]],
-                metadatas=[metadata]
+                ids=[str(uuid.uuid4()) for _ in metadatas],
+                documents=[metadata["response_message"] for metadata in metadatas],
+                metadatas=metadatas,
+                embeddings=[CHAT_LOG_EMBEDDING] * len(metadatas)
             )
             
         except Exception as e:
-            logger.error(f"Failed to save chat log: {str(e)}")
-            logger.error(f"Chat log data: {json.dumps(chat_log_data)}")
+            logger.error("Failed to save chat logs: %s", e)
+            logger.error("Chat log data: %s", json.dumps(chat_logs))
             raise
 
-    async def process_chat_message(self, agent_id: str, message: str, requestor_id: str = "administrator") -> str:
-        """Process a chat message and return the response."""
+    def _get_chat_agent(self, agent: Agent, tools: List[BaseTool], streaming: bool) -> Any:
+        """Get the chat agent runnable for an agent, reusing the last one built from the same prompt and tools.
+        
+        Args:
+            agent (Agent): The agent being chatted with
+            tools (List[BaseTool]): The agent's resolved tools
+            streaming (bool): Whether the LLM streams its tokens
+            
+        Returns:
+            Any: The runnable that plans the agent's next step
+        """
+        key = (str(agent.id), streaming)
+        # Tools and the LLM are identified by object so replacing either rebuilds
+        signature = (agent.prompt, tuple(id(tool) for tool in tools), id(self.llm))
+        with self._workflow_cache_lock:
+            entry = self._chat_agent_cache.get(key)
+        if entry and entry[0] == signature:
+            return entry[1]
+        
+        chat_agent = self._build_chat_agent(agent, tools, streaming)
+        with self._workflow_cache_lock:
+            self._chat_agent_cache.pop(key, None)
+            if len(self._chat_agent_cache) >= settings.WORKFLOW_CACHE_SIZE:
+                # Evict the oldest entry
+                self._chat_agent_cache.pop(next(iter(self._chat_agent_cache)))
+            self._chat_agent_cache[key] = (signature, chat_agent)
+        return chat_agent
+
+    def _build_chat_agent(self, agent: Agent, tools: List[BaseTool], streaming: bool) -> Any:
+        """Build the prompt and function-calling LLM an agent chats with."""
+        # Create the system message using the agent's configured prompt
+        system_template = agent.prompt
+        
+        # Add specific instructions for email handling to preserve message IDs
+        email_instructions = """
+CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
+1. When displaying email information from the gmail_unread tool, ALWAYS include the Message ID for each email
+2. NEVER reformat or hide message IDs - they are required for taking actions on emails
+3. Display the Message ID on a separate line for each email to make it clearly visible
+4. When suggesting actions, mention that users need to provide the message ID for those actions
+5. Present the full, unmodified output of email tools to maintain all necessary information
+"""
+        
+        # Add email instructions to the prompt
+        if "gmail" in " ".join(agent.tools):
+            if not any(email_keyword in system_template.lower() for email_keyword in ["email", "gmail"]):
+                system_template += "\n\n" + email_instructions
+            elif "message id" not in system_template.lower():
+                system_template += "\n\n" + email_instructions
+        
+        # Ensure critical instruction for tool usage is included
+        if "agent_scratchpad" not in system_template and "tool" in system_template.lower():
+            # Add minimal instructions for tool usage if needed
+            system_template += "\n\nYou have access to the following tools:\n"
+            for tool in tools:
+                system_template += f"\n- {tool.name}: {tool.description}"
+        
+        # Create the prompt template with chat history and agent_scratchpad
+        prompt = _chat_prompt(system_template)
+        
+        # Bind the LLM with tool specifications for function calling
+        stream_kwargs = {"stream": True, "stream_usage": True} if streaming else {}
+        llm_with_tools = self.llm.bind(
+            functions=[{
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": self.tool_registry.get_schema(tool.name)
+            } for tool in tools],
+            **stream_kwargs
+        )
+        
+        return create_openai_functions_agent(
+            llm=llm_with_tools,
+            tools=tools,
+            prompt=prompt
+        )
+
+    def _store_chat_history(self, agent_id: str, memory: ConversationSummaryBufferMemory) -> None:
+        """Merge the messages of a finished chat turn into the agent's stored context.
+        
+        Args:
+            agent_id (str): The agent that handled the turn
+            memory (ConversationSummaryBufferMemory): The conversation memory after the turn
+        """
+        # Read and write the context under one lock so concurrent history updates cannot interleave
+        with self._record_lock:
+            self._merge_chat_history(agent_id, memory)
+
+    def _merge_chat_history(self, agent_id: str, memory: ConversationSummaryBufferMemory) -> None:
+        """Write a finished turn's memory into the agent's context; called holding _record_lock."""
+        # Get current agent to update
+        current_agent = self.get_agent(agent_id)
+        if not current_agent:
+            raise ValueError(f"Agent {agent_id} not found")
+        
+        # Get existing context if any
+        existing_context = {}
+        if hasattr(current_agent, 'context') and current_agent.context:
+            if isinstance(current_agent.context, dict):
+                existing_context = current_agent.context
+            else:
+                try:
+                    existing_context = json.loads(current_agent.context)
+                except:
+                    existing_context = {}
+        
+        # Get existing chat history
+        existing_history = existing_context.get("chat_history", [])
+        
+        # Prepare the chat history update
+        # Convert all messages from memory to serializable form, stamped with one timestamp
+        now = datetime.utcnow().isoformat()
+        current_messages = []
+        for msg in memory.chat_memory.messages:
+            entry = {
+                "role": "user" if isinstance(msg, HumanMessage) else
+                        "assistant" if isinstance(msg, AIMessage) else
+                        "function" if isinstance(msg, FunctionMessage) else "system",
+                "content": str(msg.content),
+                "timestamp": now
+            }
+            # Only function messages carry a name
+            if isinstance(msg, FunctionMessage):
+                entry["name"] = str(msg.name)
+            current_messages.append(entry)
+        
+        logger.info("Current memory has %s messages", len(current_messages))
+        
+        # First check - if we had a full history before, verify we're not losing messages
+        if len(existing_history) > 50 and len(current_messages) < 50:
+            # If memory has fewer messages than before, we need to preserve history
+            logger.warning("Memory has fewer messages (%s) than history (%s). Preserving history.", len(current_messages), len(existing_history))
+            
+            # Keep existing history but add new messages (last turn)
+            # First, get the latest user message
+            latest_user_msg = next((msg for msg in reversed(current_messages) if msg["role"] == "user"), None)
+            # Then get the latest assistant response
+            latest_assistant_msg = next((msg for msg in reversed(current_messages) if msg["role"] == "assistant"), None)
+            
+            # Add these to existing history if they're not already there
+            if latest_user_msg:
+                existing_history.append(latest_user_msg)
+            if latest_assistant_msg:
+                existing_history.append(latest_assistant_msg)
+            
+            combined_history = existing_history
+        else:
+            # Use full content from memory since it contains the full conversation
+            combined_history = current_messages
+        
+        # Sort by timestamp to ensure proper ordering
+        combined_history = sorted(combined_history, key=lambda x: x.get("timestamp", ""))
+        
+        # Keep only the most recent messages so each turn writes a bounded context
+        combined_history = combined_history[-settings.CHAT_HISTORY_LIMIT:]
+        
+        # Prepare the context update
+        context = {
+            "chat_history": combined_history,
+            "last_updated": now
+        }
+        
+        # Add summary if available
+        if memory.moving_summary_buffer:
+            context["conversation_summary"] = str(memory.moving_summary_buffer)
+        
+        # Log the number of messages being stored
+        logger.info("Storing %s messages in agent context", len(combined_history))
+        
+        # Only the context changed, so skip rewriting and re-embedding the whole agent
+        self.update_context(agent_id, context)
+
+    def _append_chat_turn(self, agent_id: str, message: str, response: str) -> None:
+        """Append a turn answered without the LLM to the agent's stored chat history."""
+        # Same lock as _store_chat_history, so the two never overwrite each other's turn
+        with self._record_lock:
+            agent = self.get_agent(agent_id)
+            if agent is None:
+                return
+            
+            now = datetime.utcnow().isoformat()
+            context = dict(agent.context or {})
+            history = context.get("chat_history", []) + [
+                {"role": "user", "content": message, "timestamp": now},
+                {"role": "assistant", "content": response, "timestamp": now}
+            ]
+            context["chat_history"] = history[-settings.CHAT_HISTORY_LIMIT:]
+            context["last_updated"] = now
+            self.update_context(agent_id, context)
+
+    async def record_cached_reply(self, agent_id: str, message: str, response: str,
+                                  requestor_id: str = "administrator", duration_ms: int = 0,
+                                  store_turn: bool = True) -> None:
+        """Log a reply served without calling the LLM and add the turn to the agent's chat history.
+        
+        The chat log has status "cache_hit" and no token usage. Failing to store the
+        turn is logged, not raised. Pass store_turn=False when the turn is already
+        stored, e.g. for a reply shared with the request that generated it.
+        """
+        self.chat_log_writer.submit({
+            **self._llm_log_fields,
+            "agent_id": str(agent_id),
+            "request_message": str(message),
+            "response_message": str(response),
+            "input_tokens": "0",
+            "output_tokens": "0",
+            "total_tokens": "0",
+            "requestor_id": str(requestor_id),
+            "duration_ms": str(duration_ms),
+            "status": "cache_hit",
+            "cost": "0",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        if not store_turn:
+            return
+        try:
+            await asyncio.to_thread(self._append_chat_turn, agent_id, message, response)
+        except Exception as e:
+            logger.error("Failed to update agent context: %s", e)
+
+    async def process_chat_message(self, agent_id: str, message: str, requestor_id: str = "administrator",
+                                   callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Process a chat message and return the response.
+        
+        When callbacks are given the LLM is called in streaming mode and the
+        callbacks receive each generated token.
+        """
         start_time = time.time()
-        token_callback = TokenUsageCallback()
+        # Counts tokens and cost across every LLM call made for this message
+        token_callback = OpenAICallbackHandler()
         
         try:
             # Get the agent
-            agent = self.get_agent(agent_id)
+            agent = await self.aget_agent(agent_id)
             if not agent:
                 raise ValueError(f"Agent {agent_id} not found")
 
             # Get the tools for this agent
-            tools = []
-            for tool_name in agent.tools:
-                try:
-                    tool = self.tool_registry.get_tool(tool_name)
-                    tools.append(tool)
-                except ValueError as e:
-                    logger.warning(f"Tool {tool_name} not found: {str(e)}")
+            tools = self.tool_registry.get_tools(agent.tools)
 
             # Initialize memory with the engine's LLM for summarization
             memory = ConversationSummaryBufferMemory(
@@ -641,13 +1170,13 @@ class AgentEngine:
             # Load existing conversation history if available
             if agent.context:
                 try:
-                    # Parse the JSON context
-                    context = json.loads(agent.context)
+                    # Agents loaded from the store already hold the context as a dict
+                    context = agent.context if isinstance(agent.context, dict) else json.loads(agent.context)
                     
                     # Get the conversation history
                     if "chat_history" in context:
                         messages_to_load = context["chat_history"]
-                        logger.info(f"Loading {len(messages_to_load)} messages from agent context")
+                        logger.info("Loading %s messages from agent context", len(messages_to_load))
                         
                         for msg in messages_to_load:
                             if msg["role"] == "user":
@@ -660,12 +1189,12 @@ class AgentEngine:
                                     name=msg.get("name", "unknown_function")
                                 ))
                 except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse agent context: {str(e)}")
+                    logger.error("Failed to parse agent context: %s", e)
                 except Exception as e:
-                    logger.error(f"Error loading chat history: {str(e)}")
+                    logger.error("Error loading chat history: %s", e)
                     
                 # Log the number of messages loaded into memory
-                logger.info(f"Memory now contains {len(memory.chat_memory.messages)} messages after loading")
+                logger.info("Memory now contains %s messages after loading", len(memory.chat_memory.messages))
             
             # Add the current message to memory
             memory.chat_memory.add_message(HumanMessage(content=message))
@@ -692,57 +1221,10 @@ class AgentEngine:
                 
                 # Insert this reminder as a system message at the start of chat history
                 memory.chat_memory.messages.insert(0, SystemMessage(content=reminder))
-                logger.info(f"Added context reminder: {reminder[:100]}...")
+                logger.info("Added context reminder: %s...", reminder[:100])
 
-            # Create the system message using the agent's configured prompt
-            system_template = agent.prompt
-            
-            # Add specific instructions for email handling to preserve message IDs
-            email_instructions = """
-CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
-1. When displaying email information from the gmail_unread tool, ALWAYS include the Message ID for each email
-2. NEVER reformat or hide message IDs - they are required for taking actions on emails
-3. Display the Message ID on a separate line for each email to make it clearly visible
-4. When suggesting actions, mention that users need to provide the message ID for those actions
-5. Present the full, unmodified output of email tools to maintain all necessary information
-"""
-            
-            # Add email instructions to the prompt
-            if "gmail" in " ".join(agent.tools):
-                if not any(email_keyword in system_template.lower() for email_keyword in ["email", "gmail"]):
-                    system_template += "\n\n" + email_instructions
-                elif "message id" not in system_template.lower():
-                    system_template += "\n\n" + email_instructions
-            
-            # Ensure critical instruction for tool usage is included
-            if "agent_scratchpad" not in system_template and "tool" in system_template.lower():
-                # Add minimal instructions for tool usage if needed
-                system_template += "\n\nYou have access to the following tools:\n"
-                for tool in tools:
-                    system_template += f"\n- {tool.name}: {tool.description}"
-            
-            # Create the prompt template with chat history and agent_scratchpad
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_template),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad"),
-            ])
-            
-            # Bind the LLM with tool specifications for function calling
-            llm_with_tools = self.llm.bind(
-                functions=[{
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.args_schema.schema() if tool.args_schema else {}
-                } for tool in tools]
-            )
-            
-            agent = create_openai_functions_agent(
-                llm=llm_with_tools,
-                tools=tools,
-                prompt=prompt
-            )
+            # Prompt, tool bindings and output parsing only depend on the agent's configuration
+            agent = self._get_chat_agent(agent, tools, streaming=bool(callbacks))
             
             # Create the agent executor with memory
             agent_executor = AgentExecutor(
@@ -755,9 +1237,8 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
                 return_intermediate_steps=True  # This helps with tracking tool usage
             )
 
-            # Execute the agent with token tracking
-            with get_openai_callback() as cb:
-                # Make sure we're retaining immediate context by grabbing most recent messages
+            # Log the most recent exchange for debugging; only built when INFO is enabled
+            if logger.isEnabledFor(logging.INFO):
                 recent_exchange = []
                 for msg in memory.chat_memory.messages[-4:]:  # Get last 4 messages (2 turns of conversation)
                     if isinstance(msg, HumanMessage):
@@ -765,23 +1246,17 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
                     elif isinstance(msg, AIMessage):
                         recent_exchange.append(("ai", msg.content))
                 
-                # If we have a recent exchange, log it for debugging
                 if recent_exchange:
                     context_summary = " → ".join([f"{role}: {content[:30]}..." for role, content in recent_exchange])
-                    logger.info(f"Recent conversation context: {context_summary}")
-                
-                # Execute agent with the properly formatted context
-                response = await agent_executor.ainvoke(
-                    {
-                        "input": message,
-                    }
-                )
-                
-                # Update token tracking from the callback
-                token_callback.prompt_tokens = cb.prompt_tokens
-                token_callback.completion_tokens = cb.completion_tokens
-                token_callback.total_tokens = cb.total_tokens
-                token_callback.total_cost = cb.total_cost
+                    logger.info("Recent conversation context: %s", context_summary)
+            
+            # Execute agent with the properly formatted context
+            response = await agent_executor.ainvoke(
+                {
+                    "input": message,
+                },
+                config={"callbacks": [token_callback, *(callbacks or [])]}
+            )
 
             # Get the final output
             output = response["output"]
@@ -790,13 +1265,14 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
             duration_ms = int((time.time() - start_time) * 1000)
 
             # Log token usage information
-            logger.info(f"Token usage - Prompt: {token_callback.prompt_tokens}, " +
-                       f"Completion: {token_callback.completion_tokens}, " +
-                       f"Total: {token_callback.total_tokens}")
-            logger.info(f"Estimated cost: ${token_callback.total_cost:.6f}")
+            logger.info("Token usage - Prompt: %s, Completion: %s, Total: %s",
+                        token_callback.prompt_tokens, token_callback.completion_tokens,
+                        token_callback.total_tokens)
+            logger.info("Estimated cost: $%.6f", token_callback.total_cost)
 
             # Create chat log entry with primitive types only and ensure everything is a string
             chat_log_data = {
+                **self._llm_log_fields,
                 "agent_id": str(agent_id),
                 "request_message": str(message),
                 "response_message": str(output),
@@ -804,20 +1280,17 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
                 "output_tokens": str(token_callback.completion_tokens),
                 "total_tokens": str(token_callback.total_tokens),
                 "requestor_id": str(requestor_id),
-                "model_name": str(self.llm.model_name),
                 "duration_ms": str(duration_ms),
                 "status": "success",
-                "temperature": str(self.llm.temperature),
-                "max_tokens": str(self.llm.max_tokens) if self.llm.max_tokens else "none",
                 "cost": str(token_callback.total_cost),
                 "timestamp": datetime.utcnow().isoformat()
             }
 
             # Make sure to log the token information
-            logger.info(f"Prompt tokens: {token_callback.prompt_tokens}")
-            logger.info(f"Completion tokens: {token_callback.completion_tokens}")
-            logger.info(f"Total tokens: {token_callback.total_tokens}")
-            logger.info(f"Estimated cost: ${token_callback.total_cost:.4f}")
+            logger.info("Prompt tokens: %s", token_callback.prompt_tokens)
+            logger.info("Completion tokens: %s", token_callback.completion_tokens)
+            logger.info("Total tokens: %s", token_callback.total_tokens)
+            logger.info("Estimated cost: $%.4f", token_callback.total_cost)
 
             # Add tool calls and memory info as serialized strings
             if response.get("intermediate_steps"):
@@ -832,7 +1305,7 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
                             }
                             tool_calls.append(tool_call)
                         except Exception as e:
-                            logger.error(f"Error serializing tool call: {str(e)}")
+                            logger.error("Error serializing tool call: %s", e)
                             # Add a simplified version if serialization fails
                             tool_calls.append({
                                 "tool": "unknown",
@@ -856,98 +1329,13 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
             # Ensure all metadata values are strings
             chat_log_data = self._serialize_metadata(chat_log_data)
 
-            # Create and save chat log
+            # The chat log is written in the background; a failure to store the
+            # agent's updated context is logged without failing the reply
+            self.chat_log_writer.submit(chat_log_data)
             try:
-                self.add_chat_log(chat_log_data)
-            except Exception as e:
-                logger.error(f"Failed to save chat log: {str(e)}")
-                # Continue execution even if logging fails
-
-            # Convert messages to serializable format and update agent context
-            try:
-                # Get current agent to update
-                current_agent = self.get_agent(agent_id)
-                if not current_agent:
-                    raise ValueError(f"Agent {agent_id} not found")
-                
-                # Get existing context if any
-                existing_context = {}
-                if hasattr(current_agent, 'context') and current_agent.context:
-                    if isinstance(current_agent.context, dict):
-                        existing_context = current_agent.context
-                    else:
-                        try:
-                            existing_context = json.loads(current_agent.context)
-                        except:
-                            existing_context = {}
-                
-                # Get existing chat history
-                existing_history = existing_context.get("chat_history", [])
-                
-                # Prepare the chat history update
-                # Convert all messages from memory to serializable form
-                current_messages = [{
-                    "role": "user" if isinstance(msg, HumanMessage) else
-                           "assistant" if isinstance(msg, AIMessage) else
-                           "function" if isinstance(msg, FunctionMessage) else "system",
-                    "content": str(msg.content),
-                    "name": str(msg.name) if isinstance(msg, FunctionMessage) else None,
-                    "timestamp": datetime.utcnow().isoformat()
-                } for msg in memory.chat_memory.messages]
-                
-                logger.info(f"Current memory has {len(current_messages)} messages")
-                
-                # First check - if we had a full history before, verify we're not losing messages
-                if len(existing_history) > 50 and len(current_messages) < 50:
-                    # If memory has fewer messages than before, we need to preserve history
-                    logger.warning(f"Memory has fewer messages ({len(current_messages)}) than history ({len(existing_history)}). Preserving history.")
-                    
-                    # Keep existing history but add new messages (last turn)
-                    # First, get the latest user message
-                    latest_user_msg = next((msg for msg in reversed(current_messages) if msg["role"] == "user"), None)
-                    # Then get the latest assistant response
-                    latest_assistant_msg = next((msg for msg in reversed(current_messages) if msg["role"] == "assistant"), None)
-                    
-                    # Add these to existing history if they're not already there
-                    if latest_user_msg:
-                        existing_history.append(latest_user_msg)
-                    if latest_assistant_msg:
-                        existing_history.append(latest_assistant_msg)
-                    
-                    combined_history = existing_history
-                else:
-                    # Use full content from memory since it contains the full conversation
-                    combined_history = current_messages
-                
-                # Sort by timestamp to ensure proper ordering
-                combined_history = sorted(combined_history, key=lambda x: x.get("timestamp", ""))
-                
-                # Limit to last 100 messages if it's getting too large
-                if len(combined_history) > 100:
-                    combined_history = combined_history[-100:]
-                
-                # Prepare the context update
-                context = {
-                    "chat_history": combined_history,
-                    "last_updated": datetime.utcnow().isoformat()
-                }
-                
-                # Add summary if available
-                if memory.moving_summary_buffer:
-                    context["conversation_summary"] = str(memory.moving_summary_buffer)
-                
-                # Serialize the entire context to a JSON string
-                serialized_context = json.dumps(context)
-                
-                # Log the number of messages being stored
-                logger.info(f"Storing {len(combined_history)} messages in agent context")
-                
-                # Update the agent with the serialized context
-                self.update_agent(agent_id, {"context": serialized_context})
-                
-            except Exception as e:
-                logger.error(f"Failed to update agent context: {str(e)}")
-                # Continue execution even if context update fails
+                await asyncio.to_thread(self._store_chat_history, agent_id, memory)
+            except Exception as history_error:
+                logger.error("Failed to update agent context: %s", history_error)
 
             return output
 
@@ -955,6 +1343,7 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
             # Error handling
             duration_ms = int((time.time() - start_time) * 1000)
             error_log_data = {
+                **self._llm_log_fields,
                 "agent_id": str(agent_id),
                 "request_message": str(message),
                 "response_message": f"Error: {str(e)}",
@@ -962,23 +1351,46 @@ CRITICAL INSTRUCTIONS FOR EMAIL HANDLING:
                 "output_tokens": str(token_callback.completion_tokens),
                 "total_tokens": str(token_callback.total_tokens),
                 "requestor_id": str(requestor_id),
-                "model_name": str(self.llm.model_name),
                 "duration_ms": str(duration_ms),
                 "status": "error",
                 "error_message": str(e),
-                "temperature": str(self.llm.temperature),
-                "max_tokens": str(self.llm.max_tokens) if self.llm.max_tokens else "none",
                 "cost": str(token_callback.total_cost),
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            try:
-                self.add_chat_log(error_log_data)
-            except Exception as log_error:
-                logger.error(f"Failed to save error log: {str(log_error)}")
+            self.chat_log_writer.submit(error_log_data)
             
-            logger.error(f"Error processing chat message: {str(e)}")
+            logger.error("Error processing chat message: %s", e)
             raise
 
+    async def astream_chat_message(self, agent_id: str, message: str, requestor_id: str = "administrator") -> AsyncIterator[str]:
+        """Process a chat message, yielding response tokens as they are generated.
+        
+        The turn is logged and stored in the agent's context exactly as in
+        process_chat_message, and still completes if the consumer stops early.
+        The stream ends as soon as the reply is complete, while the turn is
+        still being saved.
+        """
+        token_callback = TokenQueueCallback()
+        task = asyncio.create_task(
+            self.process_chat_message(agent_id, message, requestor_id, callbacks=[token_callback])
+        )
+        # Hold a reference so the event loop cannot drop the task while it saves the turn
+        self._chat_tasks.add(task)
+        task.add_done_callback(self._chat_tasks.discard)
+        task.add_done_callback(lambda _: token_callback.queue.put_nowait(None))
+        
+        while (token := await token_callback.queue.get()) is not None:
+            yield token
+        
+        # Re-raise any error from generating the reply; saving it never raises
+        if task.done():
+            await task
+
+    async def wait_for_chat_tasks(self) -> None:
+        """Wait until every streamed chat turn has been saved."""
+        if self._chat_tasks:
+            await asyncio.gather(*self._chat_tasks, return_exceptions=True)
+
 # Create a global engine instance
 agent_engine = AgentEngine() 
\ No newline at end of file
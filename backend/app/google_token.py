@@ -0,0 +1,93 @@
+"""Shared storage for the Google OAuth token.
+
+Drive and Gmail authorize with the same client secrets file and share one
+token, stored as JSON in token.json next to that file. Installs from before
+the token moved to JSON have a token.pickle instead; it is converted to
+token.json the first time the token is read.
+"""
+
+import json
+import logging
+import os
+from typing import List, Optional
+
+from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FILE = 'token.json'
+LEGACY_TOKEN_FILE = 'token.pickle'
+
+def token_path(credentials_path: str) -> str:
+    """Get the path of the token file for a credentials file."""
+    return os.path.join(os.path.dirname(credentials_path), TOKEN_FILE)
+
+def _legacy_token_path(credentials_path: str) -> str:
+    return os.path.join(os.path.dirname(credentials_path), LEGACY_TOKEN_FILE)
+
+def _read_small_file(path: str) -> Optional[bytes]:
+    """
+    Read a small file with a single open and read, skipping the buffered io layer.
+
+    Args:
+        path (str): Path of the file to read
+
+    Returns:
+        Optional[bytes]: The file content, or None if the file does not exist
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        return os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+
+def token_exists(credentials_path: str) -> bool:
+    """Check whether a token, in either format, is stored for a credentials file."""
+    return os.path.exists(token_path(credentials_path)) or os.path.exists(_legacy_token_path(credentials_path))
+
+def load_token(credentials_path: str, scopes: Optional[List[str]] = None) -> Optional[Credentials]:
+    """
+    Load the stored token for a credentials file, converting a legacy pickled token to JSON.
+
+    Args:
+        credentials_path (str): Path to the client secrets JSON file
+        scopes (Optional[List[str]]): Scopes to give the credentials. Defaults to the
+            scopes the token was granted, which are also the only ones it can refresh with.
+
+    Returns:
+        Optional[Credentials]: The stored credentials, or None if no token is stored
+    """
+    token_data = _read_small_file(token_path(credentials_path))
+    if token_data is not None:
+        return Credentials.from_authorized_user_info(json.loads(token_data), scopes)
+
+    legacy_path = _legacy_token_path(credentials_path)
+    if not os.path.exists(legacy_path):
+        return None
+    # Only needed once per install, to read the legacy token
+    import pickle
+    with open(legacy_path, 'rb') as token:
+        creds = pickle.load(token)
+    save_token(credentials_path, creds)
+    logger.info("Converted %s to %s", legacy_path, token_path(credentials_path))
+    return creds
+
+def save_token(credentials_path: str, creds: Credentials) -> None:
+    """
+    Write credentials to the token file next to the credentials file.
+
+    Args:
+        credentials_path (str): Path to the client secrets JSON file
+        creds (Credentials): Credentials to save
+    """
+    with open(token_path(credentials_path), 'w') as token:
+        token.write(creds.to_json())
+
+def delete_token(credentials_path: str) -> None:
+    """Delete the stored token for a credentials file, including any legacy pickled copy."""
+    for path in (token_path(credentials_path), _legacy_token_path(credentials_path)):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,19 @@
+"""Logging setup for the API process.
+
+Modules only create their own logger with ``logging.getLogger(__name__)``;
+handlers and levels are configured here, once, by the application entry point.
+"""
+
+import logging
+
+from app.config import get_settings
+
+def configure_logging() -> None:
+    """Install the root log handler at LOG_LEVEL.
+
+    Calling this again, or after another handler was installed, has no effect.
+    """
+    logging.basicConfig(
+        level=get_settings().LOG_LEVEL,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
@@ -1,5 +1,4 @@
 import os
-import pickle
 import logging
 import base64
 import json
@@ -16,10 +15,12 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from app.google_token import delete_token, load_token, save_token, token_exists, token_path
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# If modifying these scopes, delete the file token.pickle.
+# If modifying these scopes, delete the file token.json.
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
     'https://www.googleapis.com/auth/gmail.send',
@@ -35,8 +36,7 @@ class GmailService:
             credentials_path (str): Path to the client secrets JSON file
         """
         self.credentials_path = credentials_path
-        token_dir = os.path.dirname(credentials_path)
-        self.token_path = os.path.join(token_dir, 'token.pickle')
+        self.token_path = token_path(credentials_path)
         self.service = None
         self.creds = None
         
@@ -52,13 +52,12 @@ class GmailService:
         """
         try:
             logger.info(f"Checking for token at: {self.token_path}")
-            if os.path.exists(self.token_path):
+            if token_exists(self.credentials_path):
                 logger.info("Token file found, loading credentials...")
-                with open(self.token_path, 'rb') as token:
-                    self.creds = pickle.load(token)
-                    logger.info(f"Token loaded. Valid: {self.creds and self.creds.valid}, " 
-                                f"Expired: {self.creds and self.creds.expired}, "
-                                f"Has refresh token: {self.creds and self.creds.refresh_token is not None}")
+                self.creds = load_token(self.credentials_path)
+                logger.info(f"Token loaded. Valid: {self.creds and self.creds.valid}, " 
+                            f"Expired: {self.creds and self.creds.expired}, "
+                            f"Has refresh token: {self.creds and self.creds.refresh_token is not None}")
 
             # If there are no (valid) credentials available, let the user log in.
             if not self.creds or not self.creds.valid:
@@ -79,8 +78,7 @@ class GmailService:
                 
                 # Save the credentials for the next run
                 logger.info(f"Saving credentials to: {self.token_path}")
-                with open(self.token_path, 'wb') as token:
-                    pickle.dump(self.creds, token)
+                save_token(self.credentials_path, self.creds)
 
             return self.creds
 
@@ -264,8 +262,7 @@ class GmailService:
             if self.creds:
                 self.creds.revoke(Request())
             
-            if os.path.exists(self.token_path):
-                os.remove(self.token_path)
+            delete_token(self.credentials_path)
             
             self.creds = None
             self.service = None
@@ -657,8 +654,7 @@ def get_unread_emails_json(max_results: int = 10) -> str:
         gmail = GmailService(credentials_path)
         
         # Check token validity
-        token_path = os.path.join(os.path.dirname(credentials_path), 'token.pickle')
-        if not os.path.exists(token_path):
+        if not token_exists(credentials_path):
             return json.dumps({
                 "success": False,
                 "error": "No valid token found",
@@ -193,10 +193,12 @@ class ChatMessage(BaseModel):
         content (str): The actual message content.
         chat_history (Optional[List[Dict[str, Any]]]): Previous messages in the conversation.
         timestamp (Optional[datetime]): When the message was sent.
+        no_cache (bool): Skip the semantic response cache for this message.
     """
     content: str = Field(..., description="The content of the message")
     chat_history: Optional[List[Dict[str, Any]]] = Field(default_factory=list, description="Optional chat history")
     timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow, description="Timestamp of the message")
+    no_cache: bool = Field(default=False, description="Skip the semantic response cache, e.g. for sensitive prompts")
 
 class ChatLog(BaseModel):
     """Model for logging chat interactions with agents.
@@ -0,0 +1,99 @@
+"""In-memory cache for vector store search results.
+
+Repeated searches with the same query and k are answered from memory instead
+of walking ChromaDB's HNSW index again. Entries expire after a TTL and are
+dropped whenever the searched collection changes.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.config import get_settings
+
+class QueryCache:
+    def __init__(self, max_size: int = 2000, ttl_seconds: int = 300):
+        """Initialize an empty cache.
+
+        Args:
+            max_size (int): Maximum number of cached results; the least recently
+                used entry is evicted beyond this.
+            ttl_seconds (int): How long a cached result stays valid.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(collection: str, kind: str, query: str, k: int) -> Tuple[Hashable, ...]:
+        """Build the cache key for a search.
+
+        Args:
+            collection (str): The collection being searched.
+            kind (str): The kind of search, e.g. "search" or "search_with_score".
+            query (str): The search query text.
+            k (int): Number of results requested.
+
+        Returns:
+            Tuple[Hashable, ...]: The cache key.
+        """
+        digest = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        return (collection, kind, digest, k)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        """Get a cached result, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        """Cache a search result."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        """Drop cached results for a collection, or all results if none is given."""
+        with self._lock:
+            if collection is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == collection]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counts for the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Create a global query cache instance
+settings = get_settings()
+query_cache = QueryCache(
+    max_size=settings.QUERY_CACHE_SIZE,
+    ttl_seconds=settings.QUERY_CACHE_TTL
+)
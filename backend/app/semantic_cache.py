@@ -0,0 +1,216 @@
+"""Semantic response cache for agent chat.
+
+Stores (message embedding -> response) pairs in a per-agent ChromaDB collection so
+that near-duplicate chat messages can be answered without calling the LLM. A reply
+also depends on the conversation so far, so each entry carries a key of the stored
+chat history it was generated after, and only entries with the same key can match.
+Lookups are served from an in-memory copy of each agent's entries: a per-agent
+cache is small enough that one matrix-vector product over all of them is faster
+than a ChromaDB query. The copy holds the embeddings as int8 with a scale per
+row, a quarter of the float32 size, at an error far below the hit threshold.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import chromadb
+import numpy as np
+import orjson
+
+from app.config import get_settings
+from app.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+class _Entries(NamedTuple):
+    """An agent's cached responses; replaced as a whole, never modified."""
+    vectors: np.ndarray  # int8 unit-length message embeddings, one row per entry
+    scales: np.ndarray  # per row, so that vectors * scales[:, None] restores the embedding
+    responses: List[str]
+    timestamps: np.ndarray
+    contexts: np.ndarray  # context_key() of the chat history each response followed
+
+def _unit_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Scale embeddings to unit length so dot products are cosine similarities."""
+    vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def _quantize(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize unit-length embeddings to int8, returning (vectors, per-row scales)."""
+    vectors = _unit_rows(embeddings)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+_NO_VECTORS = (np.empty((0, 0), np.int8), np.empty(0, np.float32))
+
+def context_key(chat_history: Optional[List[Dict[str, Any]]]) -> str:
+    """Key a stored chat history by the roles and contents the model sees, ignoring timestamps."""
+    turns = [(message.get("role"), message.get("content")) for message in chat_history or []]
+    return hashlib.sha256(orjson.dumps(turns)).hexdigest()
+
+# Entries cached before they carried a context key were all first messages
+EMPTY_CONTEXT = context_key([])
+
+class SemanticCache:
+    def __init__(self, threshold: float, ttl_seconds: int):
+        """Initialize the cache on the shared vector store client.
+
+        Args:
+            threshold (float): Minimum cosine similarity for a cached response to be reused.
+            ttl_seconds (int): How long a cached response stays valid.
+        """
+        self.client = vector_store.client
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._collections: Dict[str, chromadb.Collection] = {}
+        self._entries: Dict[str, _Entries] = {}
+        self._last_sweep: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection_name(agent_id: str) -> str:
+        return f"chatcache_{agent_id}"
+
+    def _get_collection(self, agent_id: str) -> chromadb.Collection:
+        """Get the cache collection for an agent, creating it on first use."""
+        collection = self._collections.get(agent_id)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(agent_id)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(
+                        name=self._collection_name(agent_id),
+                        metadata={"hnsw:space": "cosine"}
+                    )
+                    self._collections[agent_id] = collection
+        return collection
+
+    def _get_entries(self, agent_id: str) -> _Entries:
+        """Get an agent's unexpired entries, loading them from ChromaDB on first use."""
+        entries = self._entries.get(agent_id)
+        if entries is None:
+            collection = self._get_collection(agent_id)
+            with self._lock:
+                entries = self._entries.get(agent_id)
+                if entries is None:
+                    stored = collection.get(
+                        where={"ts": {"$gte": time.time() - self.ttl_seconds}},
+                        include=["embeddings", "metadatas"]
+                    )
+                    metadatas = stored["metadatas"] or []
+                    vectors, scales = _quantize(stored["embeddings"]) if metadatas else _NO_VECTORS
+                    entries = _Entries(
+                        vectors=vectors,
+                        scales=scales,
+                        responses=[metadata["response"] for metadata in metadatas],
+                        timestamps=np.array([metadata["ts"] for metadata in metadatas], dtype=np.float64),
+                        contexts=np.array([metadata.get("context", EMPTY_CONTEXT) for metadata in metadatas], dtype=str)
+                    )
+                    self._entries[agent_id] = entries
+        return entries
+
+    def lookup(self, agent_id: str, message: str, context: str) -> Tuple[Optional[List[float]], Optional[str]]:
+        """Find a cached response for a message.
+
+        Args:
+            agent_id (str): The agent the message is sent to.
+            message (str): The user's message.
+            context (str): context_key() of the agent's stored chat history.
+
+        Returns:
+            Tuple[Optional[List[float]], Optional[str]]: (message embedding, cached response
+                or None on a miss). The embedding is returned so add() can reuse it.
+        """
+        try:
+            embedding = vector_store.embed_query(message)
+            entries = self._get_entries(agent_id)
+            if not entries.responses:
+                return embedding, None
+
+            similarities = (entries.vectors @ _unit_rows([embedding])[0]) * entries.scales
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed for agent %s: %s", agent_id, e)
+            return None, None
+
+        similarities[(entries.timestamps < time.time() - self.ttl_seconds) | (entries.contexts != context)] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return embedding, None
+
+        logger.info("Semantic cache hit for agent %s (similarity %.4f)", agent_id, similarities[best])
+        return embedding, entries.responses[best]
+
+    def add(self, agent_id: str, response: str, embedding: Optional[List[float]], context: str) -> None:
+        """Cache a response for a message.
+
+        Only the message embedding is kept, not the message text: lookups never
+        read it, and ChromaDB would otherwise also add it to its full-text index.
+
+        Args:
+            agent_id (str): The agent that produced the response.
+            response (str): The agent's response.
+            embedding (Optional[List[float]]): The message embedding from lookup().
+                Nothing is cached when it is None.
+            context (str): context_key() of the chat history the response followed.
+        """
+        if embedding is None:
+            return
+
+        try:
+            now = time.time()
+            collection = self._get_collection(agent_id)
+            collection.add(
+                ids=[str(uuid.uuid4())],
+                embeddings=[embedding],
+                metadatas=[{"response": response, "ts": now, "context": context}]
+            )
+
+            with self._lock:
+                entries = self._entries.get(agent_id)
+                if entries is not None:
+                    # Appending copies every row anyway, so expired entries are dropped here too
+                    keep = entries.timestamps >= now - self.ttl_seconds
+                    vector, scale = _quantize([embedding])
+                    self._entries[agent_id] = _Entries(
+                        vectors=np.vstack([entries.vectors[keep].reshape(-1, len(embedding)), vector]),
+                        scales=np.append(entries.scales[keep], scale),
+                        responses=[r for r, kept in zip(entries.responses, keep) if kept] + [response],
+                        timestamps=np.append(entries.timestamps[keep], now),
+                        contexts=np.append(entries.contexts[keep], context)
+                    )
+
+            # Drop expired entries from ChromaDB at most once per TTL period
+            if now - self._last_sweep.get(agent_id, 0.0) > self.ttl_seconds:
+                self._last_sweep[agent_id] = now
+                collection.delete(where={"ts": {"$lt": now - self.ttl_seconds}})
+        except Exception as e:
+            logger.warning("Failed to cache response for agent %s: %s", agent_id, e)
+
+    def clear(self, agent_id: str) -> None:
+        """Drop all cached responses for an agent.
+
+        Args:
+            agent_id (str): The agent whose cache should be cleared.
+        """
+        with self._lock:
+            self._collections.pop(agent_id, None)
+            self._entries.pop(agent_id, None)
+            self._last_sweep.pop(agent_id, None)
+        try:
+            self.client.delete_collection(self._collection_name(agent_id))
+        except Exception:
+            # Nothing was cached for this agent
+            pass
+
+# Create a global semantic cache instance
+settings = get_settings()
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL
+)
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Type, Optional
+from typing import Dict, Any, Iterable, KeysView, List, Type, Optional
 from langchain.tools import BaseTool, Tool, StructuredTool
 from pydantic import BaseModel, Field, create_model
 import os
@@ -171,14 +171,14 @@ def gmail_get_unread(max_results: int = 10) -> str:
             return "\n".join(parts)
             
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {str(e)} for data: {raw_response[:100]}...")
+            logger.error("JSON decode error: %s for data: %s...", e, raw_response[:100])
             # If the response is already a formatted string, return it
             if isinstance(raw_response, str) and not raw_response.startswith('{'):
                 return raw_response
             return f"I encountered an error processing the email data: {str(e)}"
             
     except Exception as e:
-        logger.error(f"Error in gmail_get_unread: {str(e)}")
+        logger.error("Error in gmail_get_unread: %s", e)
         return f"I encountered an error while fetching your emails: {str(e)}"
 
 # Map of function names to their implementations
@@ -198,6 +198,7 @@ FUNCTION_MAP = {
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, BaseTool] = {}
+        self._schemas: Dict[str, Dict[str, Any]] = {}  # JSON schemas, built once per tool
         self._initialize_db()
         self._register_default_tools()  # Register default tools on initialization
 
@@ -218,7 +219,7 @@ class ToolRegistry:
             logger.info("ChromaDB collection 'tools' initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize ChromaDB: {str(e)}")
+            logger.error("Failed to initialize ChromaDB: %s", e)
             raise
 
     def _load_tools(self):
@@ -234,7 +235,7 @@ class ToolRegistry:
                     # Get the function from our function map
                     func_name = tool_data['func']
                     if func_name not in FUNCTION_MAP:
-                        logger.warning(f"Function {func_name} not found in FUNCTION_MAP")
+                        logger.warning("Function %s not found in FUNCTION_MAP", func_name)
                         continue
                         
                     func = FUNCTION_MAP[func_name]
@@ -251,13 +252,14 @@ class ToolRegistry:
                         args_schema=schema_class
                     )
                     self._tools[tool.name] = tool
-                logger.info(f"Loaded {len(results['ids'])} tools from ChromaDB")
+                    self._schemas[tool.name] = self._build_schema(tool)
+                logger.info("Loaded %s tools from ChromaDB", len(results['ids']))
             else:
                 logger.info("No tools found in ChromaDB, initializing with default tools")
                 self._register_default_tools()
                 
         except Exception as e:
-            logger.error(f"Failed to load tools from ChromaDB: {str(e)}")
+            logger.error("Failed to load tools from ChromaDB: %s", e)
             raise
 
     def _register_default_tools(self):
@@ -337,6 +339,7 @@ class ToolRegistry:
         try:
             # Store in memory
             self._tools[tool.name] = tool
+            self._schemas[tool.name] = self._build_schema(tool)
             
             # Get the function name from the function map
             func_name = None
@@ -346,7 +349,7 @@ class ToolRegistry:
                     break
             
             if not func_name:
-                logger.warning(f"Could not find function name for tool {tool.name}")
+                logger.warning("Could not find function name for tool %s", tool.name)
                 return
             
             # Get the schema name from our schema map
@@ -363,7 +366,7 @@ class ToolRegistry:
                 "description": tool.description,
                 "func": func_name,  # Store function name instead of function reference
                 "schema_name": schema_name,  # Store schema name instead of schema
-                "args_schema": tool.args_schema.schema() if tool.args_schema else None
+                "args_schema": self._schemas[tool.name] if tool.args_schema else None
             }
             
             # Store in ChromaDB
@@ -373,10 +376,10 @@ class ToolRegistry:
                 metadatas=[{"tool_data": json.dumps(tool_data)}]
             )
             
-            logger.info(f"Successfully registered and persisted tool: {tool.name}")
+            logger.info("Successfully registered and persisted tool: %s", tool.name)
             
         except Exception as e:
-            logger.error(f"Failed to register tool {tool.name}: {str(e)}")
+            logger.error("Failed to register tool %s: %s", tool.name, e)
             raise
 
     def get_tool(self, name: str) -> BaseTool:
@@ -385,6 +388,38 @@ class ToolRegistry:
             raise ValueError(f"Tool {name} not found")
         return self._tools[name]
 
+    def get_tools(self, names: Iterable[str]) -> List[BaseTool]:
+        """Get the registered tools among the given names, in order.
+        
+        Unknown names are skipped and reported in a single warning.
+        """
+        names = list(names)
+        missing = [name for name in names if name not in self._tools]
+        if missing:
+            logger.warning("Tools not found: %s", missing)
+        return [self._tools[name] for name in names if name in self._tools]
+
+    def names(self) -> KeysView[str]:
+        """Get a live, set-like view of the registered tool names."""
+        return self._tools.keys()
+
+    @staticmethod
+    def _build_schema(tool: BaseTool) -> Dict[str, Any]:
+        """Build the JSON schema of a tool's arguments."""
+        schema = tool.args_schema
+        if not schema:
+            return {}
+        if hasattr(schema, "model_json_schema"):
+            return schema.model_json_schema()
+        return schema.schema()
+
+    def get_schema(self, name: str) -> Dict[str, Any]:
+        """Get the JSON schema of a tool's arguments, built once per tool."""
+        schema = self._schemas.get(name)
+        if schema is None:
+            schema = self._schemas[name] = self._build_schema(self.get_tool(name))
+        return schema
+
     def list_tools(self) -> List[Dict[str, Any]]:
         """List all registered tools with their descriptions."""
         tools_list = []
@@ -395,7 +430,7 @@ class ToolRegistry:
                 "parameters": {}
             }
             if tool.args_schema:
-                tool_info["parameters"] = tool.args_schema.schema()
+                tool_info["parameters"] = self.get_schema(name)
             tools_list.append(tool_info)
         return tools_list
 
@@ -405,16 +440,17 @@ class ToolRegistry:
             if name in self._tools:
                 # Remove from memory
                 del self._tools[name]
+                self._schemas.pop(name, None)
                 
                 # Remove from ChromaDB
                 self.collection.delete(ids=[name])
                 
-                logger.info(f"Successfully unregistered and removed tool: {name}")
+                logger.info("Successfully unregistered and removed tool: %s", name)
             else:
                 raise ValueError(f"Tool {name} not found")
                 
         except Exception as e:
-            logger.error(f"Failed to unregister tool {name}: {str(e)}")
+            logger.error("Failed to unregister tool %s: %s", name, e)
             raise
 
 # Create a global tool registry instance
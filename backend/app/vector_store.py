@@ -5,14 +5,47 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain.schema import Document
 from app.models import Agent
+from app.config import get_settings
 import logging
 from chromadb.config import Settings
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+from collections import OrderedDict
+import hashlib
+import threading
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Documents per ChromaDB write; batches of 100-250 embed and insert fastest
+DOCUMENT_BATCH_SIZE = get_settings().DOCUMENT_BATCH_SIZE
+# Number of query embeddings kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+# Collection holding the documents served by search()
+DOCUMENTS_COLLECTION = "agents"
+# HNSW settings, fixed when a collection is first created. Documents are searched by
+# similarity, so they get a wider search than ChromaDB's default of 10 candidates.
+DOCUMENTS_COLLECTION_METADATA = {"hnsw:construction_ef": 128, "hnsw:search_ef": 100}
+# Chat logs are only ever filtered by metadata, so their index is built as cheaply as possible
+CHAT_LOGS_COLLECTION_METADATA = {"hnsw:space": "cosine", "hnsw:M": 8, "hnsw:construction_ef": 32}
+# Chat logs are never searched by similarity, so they all store this vector rather than
+# being run through ChromaDB's default ONNX embedder. It has the 384 dimensions of that
+# embedder's output, which logs written before it have, as a collection holds one size.
+CHAT_LOG_EMBEDDING = [1.0] + [0.0] * 383
+# Chat logs collection metadata key set once every stored log has ts_epoch
+TS_EPOCH_BACKFILLED = "ts_epoch_backfilled"
+
+def to_epoch(value: Any) -> float:
+    """Convert a datetime or ISO 8601 string to Unix epoch seconds.
+    
+    Naive values are taken as UTC, which is how chat log timestamps are stored.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
 class VectorStore:
     def __init__(self):
         """Initialize the vector store with OpenAI embeddings."""
@@ -28,6 +61,8 @@ class VectorStore:
             self.embeddings = OpenAIEmbeddings(
                 api_key=api_key
             )
+            self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+            self._query_embeddings_lock = threading.Lock()
 
             # Initialize Chroma client
             self.client = chromadb.PersistentClient(path=self.persist_directory)
@@ -36,52 +71,145 @@ class VectorStore:
             self.vector_store = Chroma(
                 persist_directory=self.persist_directory,
                 embedding_function=self.embeddings,
-                collection_name="agents",
+                collection_name=DOCUMENTS_COLLECTION,
+                collection_metadata=DOCUMENTS_COLLECTION_METADATA,
                 client=self.client
             )
 
             # Initialize collections
             self.agents_collection = self.client.get_or_create_collection("agents")
-            self.chat_logs_collection = self.client.get_or_create_collection("chat_logs")
+            # The collection behind self.vector_store, for the batched queries LangChain has no public method for
+            self.documents_collection = self.client.get_collection(DOCUMENTS_COLLECTION)
+            self.chat_logs_collection = self.client.get_or_create_collection(
+                "chat_logs",
+                metadata=CHAT_LOGS_COLLECTION_METADATA
+            )
+            self._backfill_ts_epoch()
 
             logger.info("Vector store initialized successfully")
             
         except Exception as e:
-            logger.error(f"Error initializing vector store: {str(e)}")
+            logger.error("Error initializing vector store: %s", e)
             raise
 
     def add_documents(self, documents: List[Document]) -> None:
-        """Add documents to the vector store."""
+        """Add documents to the vector store in batches sized for ChromaDB."""
         try:
-            self.vector_store.add_documents(documents)
-            logger.info(f"Added {len(documents)} documents to vector store")
+            batch_size = min(DOCUMENT_BATCH_SIZE, self.client.get_max_batch_size())
+            for i in range(0, len(documents), batch_size):
+                self.vector_store.add_documents(documents[i:i + batch_size])
+            logger.info("Added %s documents to vector store", len(documents))
         except Exception as e:
-            logger.error(f"Error adding documents: {str(e)}")
+            logger.error("Error adding documents: %s", e)
             raise
 
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the embedding of recently seen identical queries."""
+        key = hashlib.sha256(query.encode()).hexdigest()
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(key)
+                return embedding
+        
+        embedding = self.embeddings.embed_query(query)
+        with self._query_embeddings_lock:
+            self._query_embeddings[key] = embedding
+            if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all of those not seen recently in one request."""
+        keys = [hashlib.sha256(query.encode()).hexdigest() for query in queries]
+        with self._query_embeddings_lock:
+            embeddings = [self._query_embeddings.get(key) for key in keys]
+            for key, embedding in zip(keys, embeddings):
+                if embedding is not None:
+                    self._query_embeddings.move_to_end(key)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = self.embeddings.embed_documents([queries[i] for i in missing])
+            with self._query_embeddings_lock:
+                for i, embedding in zip(missing, new_embeddings):
+                    embeddings[i] = self._query_embeddings[keys[i]] = embedding
+                while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+        return embeddings
+
     def search(self, query: str, k: int = 4) -> List[Document]:
         """Search for similar documents."""
         try:
-            return self.vector_store.similarity_search(query, k=k)
+            return self.vector_store.similarity_search_by_vector(self.embed_query(query), k=k)
+        except Exception as e:
+            logger.error("Error searching documents: %s", e)
+            raise
+
+    def search_batch(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """Search for similar documents for several queries at once.
+        
+        The queries are embedded in one request and looked up in one ChromaDB query.
+        
+        Args:
+            queries (List[str]): The search queries.
+            k (int): Number of results per query.
+            
+        Returns:
+            List[List[Document]]: The results for each query, in the order of queries.
+        """
+        try:
+            results = self.documents_collection.query(
+                query_embeddings=self.embed_queries(queries),
+                n_results=k,
+                include=["documents", "metadatas"]
+            )
+            return [
+                [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+                for texts, metadatas in zip(results["documents"], results["metadatas"])
+            ]
         except Exception as e:
-            logger.error(f"Error searching documents: {str(e)}")
+            logger.error("Error batch searching documents: %s", e)
             raise
 
     def search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
         """Search for similar documents with similarity scores."""
         try:
-            return self.vector_store.similarity_search_with_score(query, k=k)
+            return self.vector_store.similarity_search_by_vector_with_relevance_scores(self.embed_query(query), k=k)
         except Exception as e:
-            logger.error(f"Error searching documents with score: {str(e)}")
+            logger.error("Error searching documents with score: %s", e)
             raise
 
+    def warmup(self) -> bool:
+        """Load the documents collection's vector index before the first search.
+        
+        Chroma opens a collection's HNSW index from disk on the first query, so
+        this runs one query with an embedding already stored in the collection.
+        No embedding request is sent to OpenAI.
+        
+        Returns:
+            bool: True if the index was loaded, False if the collection is empty or loading failed
+        """
+        try:
+            collection = self.client.get_collection(DOCUMENTS_COLLECTION)
+            stored = collection.get(limit=1, include=["embeddings"])
+            if not stored["ids"]:
+                logger.info("Documents collection is empty, skipping vector index warmup")
+                return False
+            collection.query(query_embeddings=stored["embeddings"], n_results=1, include=[])
+            logger.info("Vector index warmed up")
+            return True
+        except Exception as e:
+            logger.warning("Vector index warmup failed: %s", e)
+            return False
+
     def delete_collection(self, collection_name: str) -> None:
         """Delete a collection from the vector store."""
         try:
             self.client.delete_collection(collection_name)
-            logger.info(f"Deleted collection: {collection_name}")
+            logger.info("Deleted collection: %s", collection_name)
         except Exception as e:
-            logger.error(f"Error deleting collection: {str(e)}")
+            logger.error("Error deleting collection: %s", e)
             raise
 
     def get_collection(self, collection_name: str) -> Optional[chromadb.Collection]:
@@ -89,14 +217,45 @@ class VectorStore:
         try:
             return self.client.get_collection(collection_name)
         except Exception as e:
-            logger.error(f"Error getting collection: {str(e)}")
+            logger.error("Error getting collection: %s", e)
             return None
 
-    def add_chat_log(self, chat_log_data: Dict) -> str:
-        """Add a chat log to the collection."""
+    def _backfill_ts_epoch(self) -> None:
+        """Add the numeric ts_epoch field to chat logs stored before it existed.
+        
+        ChromaDB cannot filter on a missing field, so every log has to be read once;
+        the collection is then marked so later startups skip the scan.
+        """
+        collection_metadata = self.chat_logs_collection.metadata or {}
+        if collection_metadata.get(TS_EPOCH_BACKFILLED):
+            return
+        
+        results = self.chat_logs_collection.get(include=["metadatas"])
+        ids, metadatas = [], []
+        for log_id, metadata in zip(results['ids'], results['metadatas']):
+            if 'ts_epoch' not in metadata and metadata.get('timestamp'):
+                metadata['ts_epoch'] = to_epoch(metadata['timestamp'])
+                ids.append(log_id)
+                metadatas.append(metadata)
+        
+        if ids:
+            batch_size = self.client.get_max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                self.chat_logs_collection.update(
+                    ids=ids[start:start + batch_size],
+                    metadatas=metadatas[start:start + batch_size]
+                )
+            logger.info("Added ts_epoch to %s existing chat logs", len(ids))
+        
+        # modify() rejects hnsw:space; the index keeps its own copy of the HNSW settings
+        collection_metadata = {key: value for key, value in collection_metadata.items() if key != "hnsw:space"}
+        self.chat_logs_collection.modify(metadata={**collection_metadata, TS_EPOCH_BACKFILLED: True})
+
+    def _prepare_chat_log(self, chat_log_data: Dict, timestamp: str, ts_epoch: float) -> Tuple[str, Dict[str, Any], str]:
+        """Assign an id and timestamp to a chat log and convert it for storage."""
         log_id = str(uuid.uuid4())
         chat_log_data['id'] = log_id
-        chat_log_data['timestamp'] = datetime.utcnow().isoformat()
+        chat_log_data['timestamp'] = timestamp
         
         # Convert all values to strings to satisfy ChromaDB requirements
         string_metadata = {}
@@ -105,22 +264,46 @@ class VectorStore:
                 string_metadata[key] = json.dumps(value)
             else:
                 string_metadata[key] = str(value)
+        # Numeric copy of the timestamp so time ranges can be filtered inside ChromaDB
+        string_metadata['ts_epoch'] = ts_epoch
         
-        # Store the chat log
+        document = f"{chat_log_data['request_message']}\n{chat_log_data['response_message']}"
+        return log_id, string_metadata, document
+
+    def add_chat_log(self, chat_log_data: Dict) -> str:
+        """Add a chat log to the collection."""
+        return self.add_chat_logs_batch([chat_log_data])[0]
+
+    def add_chat_logs_batch(self, chat_logs: List[Dict]) -> List[str]:
+        """Add several chat logs to the collection in a single write."""
+        if not chat_logs:
+            return []
+        
+        now = datetime.utcnow()
+        timestamp = now.isoformat()
+        ts_epoch = to_epoch(now)
+        ids, metadatas, documents = zip(*(self._prepare_chat_log(log, timestamp, ts_epoch) for log in chat_logs))
+        
+        # Store the chat logs
         self.chat_logs_collection.add(
-            ids=[log_id],
-            metadatas=[string_metadata],
-            documents=[f"{chat_log_data['request_message']}\n{chat_log_data['response_message']}"],
-            embeddings=None  # Let Chroma compute embeddings
+            ids=list(ids),
+            metadatas=list(metadatas),
+            documents=list(documents),
+            embeddings=[CHAT_LOG_EMBEDDING] * len(ids)
         )
-        return log_id
+        return list(ids)
 
-    def get_chat_logs_by_agent(self, agent_id: str) -> List[Dict]:
-        """Get all chat logs for a specific agent."""
+    def get_chat_logs_by_agent(self, agent_id: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Get chat logs for a specific agent, all of them unless limit is given."""
         results = self.chat_logs_collection.get(
-            where={"agent_id": agent_id}
+            where={"agent_id": agent_id},
+            limit=limit,
+            offset=offset
         )
-        
+        return self._agent_chat_logs(results)
+
+    def _agent_chat_logs(self, results: Dict[str, Any]) -> List[Dict]:
+        """Convert the result of a chat logs collection get() into chat log dictionaries."""
         logs = []
         if results['metadatas']:
             for i, metadata in enumerate(results['metadatas']):
@@ -166,85 +349,108 @@ class VectorStore:
                 
         return logs
 
-    def get_chat_logs_by_timerange(self, start_time: str, end_time: str) -> List[Dict]:
-        """Get chat logs within a specific time range."""
-        # Convert timestamps to ISO format strings for comparison
-        start_iso = datetime.fromisoformat(start_time.replace('Z', '+00:00')).isoformat()
-        end_iso = datetime.fromisoformat(end_time.replace('Z', '+00:00')).isoformat()
-        
-        # Get all logs
-        results = self.chat_logs_collection.get()
+    def get_chat_logs_by_timerange(self, start_time: datetime, end_time: datetime, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Get chat logs within a specific time range, all of them unless limit is given."""
+        results = self.chat_logs_collection.get(
+            where=self._timerange_filter(start_time, end_time),
+            limit=limit,
+            offset=offset
+        )
         if not results['metadatas']:
             return []
             
-        # Filter logs within the time range and ensure metadata is properly formatted
+        # Ensure metadata is properly formatted
         filtered_logs = []
         for i, metadata in enumerate(results['metadatas']):
-            log_time = metadata.get('timestamp', '')
-            if log_time and start_iso <= log_time <= end_iso:
-                # Add id from results['ids'] if available
-                if 'ids' in results and i < len(results['ids']):
-                    metadata['id'] = results['ids'][i]
-                    
-                # Add content from results['documents'] if available
-                if 'documents' in results and i < len(results['documents']):
-                    metadata['content'] = results['documents'][i]
+            # Add id from results['ids'] if available
+            if 'ids' in results and i < len(results['ids']):
+                metadata['id'] = results['ids'][i]
                 
-                # Ensure metadata is a dictionary
-                if isinstance(metadata.get('metadata'), str):
-                    try:
-                        metadata['metadata'] = json.loads(metadata['metadata'])
-                    except json.JSONDecodeError:
-                        metadata['metadata'] = {}
-                elif metadata.get('metadata') is None:
+            # Add content from results['documents'] if available
+            if 'documents' in results and i < len(results['documents']):
+                metadata['content'] = results['documents'][i]
+            
+            # Ensure metadata is a dictionary
+            if isinstance(metadata.get('metadata'), str):
+                try:
+                    metadata['metadata'] = json.loads(metadata['metadata'])
+                except json.JSONDecodeError:
                     metadata['metadata'] = {}
-                    
-                # Set default values for missing fields required by ChatLog model
-                metadata['user'] = metadata.get('requestor_id', 'Administrator')
-                metadata['department'] = metadata.get('department', 'Post Trade')
+            elif metadata.get('metadata') is None:
+                metadata['metadata'] = {}
                 
-                # Convert string numeric values to actual numbers
-                try:
-                    metadata['input_tokens'] = int(metadata.get('input_tokens', '0'))
-                    metadata['output_tokens'] = int(metadata.get('output_tokens', '0'))
-                    metadata['total_tokens'] = int(metadata.get('total_tokens', '0'))
-                    metadata['duration_ms'] = int(metadata.get('duration_ms', '0'))
-                    
-                    # Handle cost carefully
-                    cost_str = metadata.get('cost', '0.0')
-                    if cost_str and cost_str != 'none':
-                        metadata['cost'] = float(cost_str)
-                    else:
-                        metadata['cost'] = 0.0
-                        
-                    # Handle temperature carefully
-                    temp_str = metadata.get('temperature', '0.0')
-                    if temp_str and temp_str != 'none':
-                        metadata['temperature'] = float(temp_str)
-                    else:
-                        metadata['temperature'] = 0.0
-                        
-                except (ValueError, TypeError) as e:
-                    # Log the error
-                    logger.warning(f"Error converting numeric values in metadata: {str(e)}")
-                    logger.debug(f"Problematic metadata: {metadata}")
-                    
-                    # Default to 0 if conversion fails
-                    metadata['input_tokens'] = 0
-                    metadata['output_tokens'] = 0
-                    metadata['total_tokens'] = 0
-                    metadata['duration_ms'] = 0
+            # Set default values for missing fields required by ChatLog model
+            metadata['user'] = metadata.get('requestor_id', 'Administrator')
+            metadata['department'] = metadata.get('department', 'Post Trade')
+            
+            # Convert string numeric values to actual numbers
+            try:
+                metadata['input_tokens'] = int(metadata.get('input_tokens', '0'))
+                metadata['output_tokens'] = int(metadata.get('output_tokens', '0'))
+                metadata['total_tokens'] = int(metadata.get('total_tokens', '0'))
+                metadata['duration_ms'] = int(metadata.get('duration_ms', '0'))
+                
+                # Handle cost carefully
+                cost_str = metadata.get('cost', '0.0')
+                if cost_str and cost_str != 'none':
+                    metadata['cost'] = float(cost_str)
+                else:
                     metadata['cost'] = 0.0
+                    
+                # Handle temperature carefully
+                temp_str = metadata.get('temperature', '0.0')
+                if temp_str and temp_str != 'none':
+                    metadata['temperature'] = float(temp_str)
+                else:
                     metadata['temperature'] = 0.0
+                    
+            except (ValueError, TypeError) as e:
+                # Log the error
+                logger.warning("Error converting numeric values in metadata: %s", e)
+                logger.debug("Problematic metadata: %s", metadata)
                 
-                filtered_logs.append(metadata)
-                
+                # Default to 0 if conversion fails
+                metadata['input_tokens'] = 0
+                metadata['output_tokens'] = 0
+                metadata['total_tokens'] = 0
+                metadata['duration_ms'] = 0
+                metadata['cost'] = 0.0
+                metadata['temperature'] = 0.0
+            
+            filtered_logs.append(metadata)
+            
         return filtered_logs
 
+    @staticmethod
+    def _timerange_filter(start_time: datetime, end_time: datetime) -> Dict:
+        """Build a ChromaDB where clause matching logs between two times."""
+        return {"$and": [
+            {"ts_epoch": {"$gte": to_epoch(start_time)}},
+            {"ts_epoch": {"$lte": to_epoch(end_time)}}
+        ]}
+
     def get_token_usage_by_agent(self, agent_id: str) -> Dict:
         """Get token usage statistics for a specific agent."""
-        logs = self.get_chat_logs_by_agent(agent_id)
+        # Only the metadata carries token counts, so leave the documents in ChromaDB
+        results = self.chat_logs_collection.get(where={"agent_id": agent_id}, include=["metadatas"])
+        return self._summarize_token_usage(results['metadatas'])
+
+    def get_agent_summary(self, agent_id: str, limit: Optional[int] = 100, offset: int = 0) -> Dict:
+        """Get one page of an agent's chat logs and its token usage over all of them.
         
+        Both come from a single collection query: the token totals are summed over
+        every log's metadata, and only the requested page is converted to chat logs.
+        """
+        results = self.chat_logs_collection.get(where={"agent_id": agent_id})
+        end = None if limit is None else offset + limit
+        page = {key: results[key][offset:end] for key in ("ids", "metadatas", "documents")}
+        return {
+            "chat_logs": self._agent_chat_logs(page),
+            "token_usage": self._summarize_token_usage(results['metadatas'])
+        }
+
+    def _summarize_token_usage(self, logs: List[Dict]) -> Dict:
+        """Sum token usage and cost over a list of chat logs."""
         # Safely parse and sum up token usage, handling different data types
         total_input = 0
         total_output = 0
@@ -270,8 +476,8 @@ class VectorStore:
                 
             except (ValueError, TypeError) as e:
                 # Log the error but continue processing
-                logger.warning(f"Error parsing token values in log: {str(e)}")
-                logger.debug(f"Problematic log entry: {log}")
+                logger.warning("Error parsing token values in log: %s", e)
+                logger.debug("Problematic log entry: %s", log)
         
         return {
             "total_input_tokens": total_input,
@@ -281,82 +487,77 @@ class VectorStore:
             "total_interactions": len(logs)
         }
 
-    def get_chat_logs_by_agent_and_timerange(self, agent_id: str, start_time: str, end_time: str) -> List[Dict]:
-        """Get chat logs for a specific agent within a specific time range."""
-        # Convert timestamps to ISO format strings for comparison
-        start_iso = datetime.fromisoformat(start_time.replace('Z', '+00:00')).isoformat()
-        end_iso = datetime.fromisoformat(end_time.replace('Z', '+00:00')).isoformat()
-        
-        # Get all logs for the agent
+    def get_chat_logs_by_agent_and_timerange(self, agent_id: str, start_time: datetime, end_time: datetime, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Get chat logs for a specific agent within a specific time range, all of them unless limit is given."""
         results = self.chat_logs_collection.get(
-            where={"agent_id": agent_id}
+            where={"$and": [{"agent_id": agent_id}, *self._timerange_filter(start_time, end_time)["$and"]]},
+            limit=limit,
+            offset=offset
         )
         
         if not results['metadatas']:
             return []
             
-        # Filter logs within the time range and ensure metadata is properly formatted
+        # Ensure metadata is properly formatted
         filtered_logs = []
         for i, metadata in enumerate(results['metadatas']):
-            log_time = metadata.get('timestamp', '')
-            if log_time and start_iso <= log_time <= end_iso:
-                # Add id from results['ids'] if available
-                if 'ids' in results and i < len(results['ids']):
-                    metadata['id'] = results['ids'][i]
-                    
-                # Add content from results['documents'] if available
-                if 'documents' in results and i < len(results['documents']):
-                    metadata['content'] = results['documents'][i]
+            # Add id from results['ids'] if available
+            if 'ids' in results and i < len(results['ids']):
+                metadata['id'] = results['ids'][i]
                 
-                # Ensure metadata is a dictionary
-                if isinstance(metadata.get('metadata'), str):
-                    try:
-                        metadata['metadata'] = json.loads(metadata['metadata'])
-                    except json.JSONDecodeError:
-                        metadata['metadata'] = {}
-                elif metadata.get('metadata') is None:
+            # Add content from results['documents'] if available
+            if 'documents' in results and i < len(results['documents']):
+                metadata['content'] = results['documents'][i]
+            
+            # Ensure metadata is a dictionary
+            if isinstance(metadata.get('metadata'), str):
+                try:
+                    metadata['metadata'] = json.loads(metadata['metadata'])
+                except json.JSONDecodeError:
                     metadata['metadata'] = {}
-                    
-                # Set default values for missing fields required by ChatLog model
-                metadata['user'] = metadata.get('requestor_id', 'Administrator')
-                metadata['department'] = metadata.get('department', 'Post Trade')
+            elif metadata.get('metadata') is None:
+                metadata['metadata'] = {}
                 
-                # Convert string numeric values to actual numbers
-                try:
-                    metadata['input_tokens'] = int(metadata.get('input_tokens', '0'))
-                    metadata['output_tokens'] = int(metadata.get('output_tokens', '0'))
-                    metadata['total_tokens'] = int(metadata.get('total_tokens', '0'))
-                    metadata['duration_ms'] = int(metadata.get('duration_ms', '0'))
-                    
-                    # Handle cost carefully
-                    cost_str = metadata.get('cost', '0.0')
-                    if cost_str and cost_str != 'none':
-                        metadata['cost'] = float(cost_str)
-                    else:
-                        metadata['cost'] = 0.0
-                        
-                    # Handle temperature carefully
-                    temp_str = metadata.get('temperature', '0.0')
-                    if temp_str and temp_str != 'none':
-                        metadata['temperature'] = float(temp_str)
-                    else:
-                        metadata['temperature'] = 0.0
-                        
-                except (ValueError, TypeError) as e:
-                    # Log the error
-                    logger.warning(f"Error converting numeric values in metadata: {str(e)}")
-                    logger.debug(f"Problematic metadata: {metadata}")
-                    
-                    # Default to 0 if conversion fails
-                    metadata['input_tokens'] = 0
-                    metadata['output_tokens'] = 0
-                    metadata['total_tokens'] = 0
-                    metadata['duration_ms'] = 0
+            # Set default values for missing fields required by ChatLog model
+            metadata['user'] = metadata.get('requestor_id', 'Administrator')
+            metadata['department'] = metadata.get('department', 'Post Trade')
+            
+            # Convert string numeric values to actual numbers
+            try:
+                metadata['input_tokens'] = int(metadata.get('input_tokens', '0'))
+                metadata['output_tokens'] = int(metadata.get('output_tokens', '0'))
+                metadata['total_tokens'] = int(metadata.get('total_tokens', '0'))
+                metadata['duration_ms'] = int(metadata.get('duration_ms', '0'))
+                
+                # Handle cost carefully
+                cost_str = metadata.get('cost', '0.0')
+                if cost_str and cost_str != 'none':
+                    metadata['cost'] = float(cost_str)
+                else:
                     metadata['cost'] = 0.0
+                    
+                # Handle temperature carefully
+                temp_str = metadata.get('temperature', '0.0')
+                if temp_str and temp_str != 'none':
+                    metadata['temperature'] = float(temp_str)
+                else:
                     metadata['temperature'] = 0.0
+                    
+            except (ValueError, TypeError) as e:
+                # Log the error
+                logger.warning("Error converting numeric values in metadata: %s", e)
+                logger.debug("Problematic metadata: %s", metadata)
                 
-                filtered_logs.append(metadata)
-                
+                # Default to 0 if conversion fails
+                metadata['input_tokens'] = 0
+                metadata['output_tokens'] = 0
+                metadata['total_tokens'] = 0
+                metadata['duration_ms'] = 0
+                metadata['cost'] = 0.0
+                metadata['temperature'] = 0.0
+            
+            filtered_logs.append(metadata)
+            
         return filtered_logs
 
 # Create a global vector store instance
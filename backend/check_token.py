@@ -1,25 +1,25 @@
 import os
-import pickle
 import logging
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from datetime import datetime
 
+from app.google_token import load_token, save_token, token_exists, token_path
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def check_token(credentials_path, token_path):
+def check_token(credentials_path):
     """Check if token is valid, expired, or missing and try to refresh if needed."""
-    logger.info(f"Checking token at: {token_path}")
+    logger.info(f"Checking token at: {token_path(credentials_path)}")
     
-    if not os.path.exists(token_path):
-        logger.error(f"Token file not found at: {token_path}")
+    if not token_exists(credentials_path):
+        logger.error(f"Token file not found at: {token_path(credentials_path)}")
         return False, "Token file not found"
     
     try:
-        with open(token_path, 'rb') as token:
-            creds = pickle.load(token)
+        creds = load_token(credentials_path)
             
         # Check token validity
         logger.info(f"Token loaded. Valid: {creds and creds.valid}, " 
@@ -33,8 +33,7 @@ def check_token(credentials_path, token_path):
                 creds.refresh(Request())
                 
                 # Save the refreshed credentials
-                with open(token_path, 'wb') as token:
-                    pickle.dump(creds, token)
+                save_token(credentials_path, creds)
                     
                 logger.info("Token refreshed successfully")
                 return True, "Token refreshed successfully"
@@ -56,7 +55,6 @@ if __name__ == "__main__":
     # Set paths to credentials and token
     base_dir = os.path.dirname(os.path.abspath(__file__))
     credentials_path = os.path.join(base_dir, 'credentials', 'google_credentials.json')
-    token_path = os.path.join(base_dir, 'credentials', 'token.pickle')
     
     # Check if credentials file exists
     if not os.path.exists(credentials_path):
@@ -64,7 +62,7 @@ if __name__ == "__main__":
         exit(1)
         
     # Check token validity
-    success, message = check_token(credentials_path, token_path)
+    success, message = check_token(credentials_path)
     
     if success:
         print(f"SUCCESS: {message}")
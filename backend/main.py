@@ -1,12 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.endpoints import router
-from app.config import settings
+from app.config import get_settings
+from app.drive_service import warmup as warmup_drive_service
+from app.dispatcher import agent_dispatcher
+from app.document_batcher import document_batcher
+from app.vector_store import vector_store
+from app.logging_config import configure_logging
+from app.engine import agent_engine, AgentNotFoundError, InvalidAgentStateError
+
+configure_logging()
 
 app = FastAPI(
     title="iHubPT API",
     description="API for managing AI agents with HITL capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    # Serialize responses with orjson; list and search endpoints return large bodies
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -18,13 +31,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON bodies such as search results and chat log pages. Starlette
+# 0.46+ (pinned in requirements.txt) skips text/event-stream responses, so chat
+# streaming is unaffected
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include routers
 app.include_router(
     router,
-    prefix=settings.API_V1_PREFIX,
+    prefix=get_settings().API_V1_PREFIX,
     tags=["agents"]
 )
 
+# Routes only handle the success path; errors raised by the engine and stores are mapped here
+@app.exception_handler(AgentNotFoundError)
+async def agent_not_found_handler(request: Request, exc: AgentNotFoundError):
+    """Return 404 when a route is given an unknown agent ID."""
+    return ORJSONResponse(status_code=404, content={"detail": str(exc)})
+
+@app.exception_handler(InvalidAgentStateError)
+async def invalid_agent_state_handler(request: Request, exc: InvalidAgentStateError):
+    """Return 400 when an agent's status does not allow the requested change."""
+    return ORJSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.exception_handler(Exception)
+async def unhandled_error_handler(request: Request, exc: Exception):
+    """Return 500 for any other error; the server still logs the traceback."""
+    return ORJSONResponse(status_code=500, content={"detail": str(exc)})
+
+@app.on_event("startup")
+async def startup():
+    """Start the agent dispatcher, load agents and warm up the vector index and external service clients before the first request."""
+    agent_dispatcher.start()
+    await asyncio.gather(
+        asyncio.to_thread(agent_engine.preload_agents),
+        asyncio.to_thread(vector_store.warmup),
+        warmup_drive_service()
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the agent dispatcher workers, finish saving streamed chat turns and document uploads, and write the queued chat logs."""
+    await agent_dispatcher.stop()
+    await agent_engine.wait_for_chat_tasks()
+    await document_batcher.wait_for_flushes()
+    await agent_engine.chat_log_writer.stop()
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -41,5 +93,8 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=True,
+        # uvloop is not available on Windows, where "auto" falls back to asyncio
+        loop="auto",
+        http="httptools"
     ) 
\ No newline at end of file
@@ -0,0 +1,41 @@
+from app.agent_store import AgentStore
+
+def make_record(agent_id, name="agent", created_at=1):
+    return {
+        "id": agent_id,
+        "name": name,
+        "description": "d",
+        "prompt": "p",
+        "tools": "example_tool",
+        "hitl_enabled": False,
+        "status": "IDLE",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "context": "{}"
+    }
+
+def test_upsert_creates_and_replaces(tmp_path):
+    store = AgentStore(f"sqlite:///{tmp_path / 'agents.db'}")
+    store.upsert([make_record("a"), make_record("b")])
+    store.upsert([make_record("a", name="renamed")])
+
+    assert store.count() == 2
+    assert store.get("a")["name"] == "renamed"
+    assert store.get("missing") is None
+
+def test_list_pages_in_creation_order(tmp_path):
+    store = AgentStore(f"sqlite:///{tmp_path / 'agents.db'}")
+    store.upsert([make_record("late", created_at=3), make_record("early", created_at=1), make_record("mid", created_at=2)])
+
+    assert [r["id"] for r in store.list()] == ["early", "mid", "late"]
+    assert [r["id"] for r in store.list(limit=1, offset=1)] == ["mid"]
+
+def test_update_and_delete_report_missing_agents(tmp_path):
+    store = AgentStore(f"sqlite:///{tmp_path / 'agents.db'}")
+    store.upsert([make_record("a")])
+
+    assert store.update("a", {"status": "RUNNING", "updated_at": 5})
+    assert store.get("a")["status"] == "RUNNING"
+    assert not store.update("missing", {"status": "RUNNING"})
+    assert store.delete("a")
+    assert not store.delete("a")
@@ -76,8 +76,8 @@ def test_agent_lifecycle(client, test_agent):
     
     # Start the agent
     start_response = client.post(f"/api/v1/agents/{agent_id}/start")
-    assert start_response.status_code == status.HTTP_200_OK
-    assert start_response.json()["status"] == "success"
+    assert start_response.status_code == status.HTTP_202_ACCEPTED
+    assert start_response.json()["status"] == "queued"
     
     # Check agent status
     status_response = client.get(f"/api/v1/agents/{agent_id}/status")
@@ -0,0 +1,29 @@
+import asyncio
+
+from app.chat_log_writer import ChatLogWriter
+
+def test_queued_logs_are_written_together():
+    batches = []
+
+    async def run():
+        writer = ChatLogWriter(batches.append, queue_size=10, batch_size=3, flush_interval=0.01)
+        for i in range(5):
+            writer.submit({"agent_id": "a", "n": i})
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert [[log["n"] for log in batch] for batch in batches] == [[0, 1, 2], [3, 4]]
+
+def test_stop_writes_pending_logs_and_full_queue_drops():
+    batches = []
+
+    async def run():
+        writer = ChatLogWriter(batches.append, queue_size=2, batch_size=10, flush_interval=60)
+        for i in range(4):
+            writer.submit({"agent_id": "a", "n": i})
+        await asyncio.sleep(0)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert sorted(log["n"] for batch in batches for log in batch) == [0, 1]
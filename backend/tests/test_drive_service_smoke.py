@@ -0,0 +1,112 @@
+import json
+import os
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+from app.drive_service import DocumentStoreService, DriveService, _OrjsonModel
+
+TEST_CONTENT = "This is a test document created by DocumentStoreService"
+TEST_FILE = {
+    "id": "file-1",
+    "name": "test_document.txt",
+    "mimeType": "text/plain",
+    "createdTime": "2024-01-01T00:00:00.000Z",
+    "modifiedTime": "2024-01-01T00:00:00.000Z",
+    "size": str(len(TEST_CONTENT))
+}
+
+def replay(responses):
+    """Build a Drive service that replays recorded (headers, body) responses."""
+    return build('drive', 'v3', http=HttpMockSequence(responses),
+                 model=_OrjsonModel(), static_discovery=True)
+
+def media_response(content: bytes):
+    size = len(content)
+    return ({'status': '200', 'content-range': f'bytes 0-{size - 1}/{size}'}, content)
+
+@pytest.fixture
+def doc_service(tmp_path):
+    return DocumentStoreService(str(tmp_path / 'google_credentials.json'),
+                                cache_dir=str(tmp_path / 'cache'))
+
+def test_create_file(doc_service):
+    doc_service.service = replay([({'status': '200'}, json.dumps(TEST_FILE))])
+
+    file, error = doc_service.create_file("test_document.txt", TEST_CONTENT)
+    assert error is None
+    assert file["id"] == TEST_FILE["id"]
+    assert file["name"] == TEST_FILE["name"]
+
+def test_search_files_follows_pages(doc_service):
+    doc_service.service = replay([
+        ({'status': '200'}, json.dumps({'files': [TEST_FILE], 'nextPageToken': 'next'})),
+        ({'status': '200'}, json.dumps({'files': [dict(TEST_FILE, id='file-2')]}))
+    ])
+
+    files, error = doc_service.search_files("mimeType = 'text/plain'", max_results=5)
+    assert error is None
+    assert [f["id"] for f in files] == ["file-1", "file-2"]
+
+def test_get_file_content_uses_cache(doc_service):
+    metadata = ({'status': '200'}, json.dumps({'modifiedTime': TEST_FILE["modifiedTime"]}))
+    doc_service.service = replay([metadata, media_response(TEST_CONTENT.encode()), metadata])
+
+    assert doc_service.get_file_content("file-1") == (TEST_CONTENT, None)
+    # The second read only validates modifiedTime and is served from the cache
+    assert doc_service.get_file_content("file-1") == (TEST_CONTENT, None)
+
+def test_cache_evicts_least_recently_used(doc_service):
+    assert not os.path.exists(doc_service.cache_dir)
+    doc_service._write_cached_content("old", "t", b"a" * 1000)
+    doc_service._write_cached_content("new", "t", b"b" * 1000)
+    entry_size = os.path.getsize(os.path.join(doc_service.cache_dir, "old"))
+    os.utime(os.path.join(doc_service.cache_dir, "old"), (0, 0))
+    os.utime(os.path.join(doc_service.cache_dir, "new"), (1, 1))
+
+    # Reading "old" marks it as used, so "new" is evicted instead
+    assert doc_service._read_cached_content("old", "t") == b"a" * 1000
+    doc_service.cache_max_bytes = 2 * entry_size
+    doc_service._write_cached_content("third", "t", b"c" * 1000)
+
+    assert sorted(os.listdir(doc_service.cache_dir)) == ["old", "third"]
+
+def test_get_file_content_invalid_utf8(doc_service):
+    doc_service.service = replay([
+        ({'status': '200'}, json.dumps({'modifiedTime': TEST_FILE["modifiedTime"]})),
+        media_response(b'\xff\xfebad')
+    ])
+
+    content, error = doc_service.get_file_content("file-1")
+    assert content is None
+    assert error.startswith("Error getting file content")
+
+def test_find_file_by_name(doc_service):
+    doc_service.service = replay([({'status': '200'}, json.dumps({'files': [TEST_FILE]}))])
+
+    found_file, error = doc_service.find_file_by_name("test_document.txt")
+    assert error is None
+    assert found_file["name"] == TEST_FILE["name"]
+
+def test_find_file_by_name_not_found(doc_service):
+    doc_service.service = replay([({'status': '200'}, json.dumps({'files': []}))])
+
+    found_file, error = doc_service.find_file_by_name("missing.txt")
+    assert found_file is None
+    assert error == "No file found with name: missing.txt"
+
+def test_get_file_content_by_name(doc_service):
+    doc_service.service = replay([
+        ({'status': '200'}, json.dumps({'files': [{'id': 'file-1', 'modifiedTime': TEST_FILE["modifiedTime"]}]})),
+        media_response(TEST_CONTENT.encode())
+    ])
+
+    assert doc_service.get_file_content_by_name("test_document.txt") == (TEST_CONTENT, None)
+
+def test_drive_list_files(tmp_path, monkeypatch):
+    drive_service = DriveService(str(tmp_path / 'google_credentials.json'))
+    service = replay([({'status': '200'}, json.dumps({'files': [TEST_FILE]}))])
+    monkeypatch.setattr('app.drive_service._get_cached_service', lambda path: service)
+
+    files, error = drive_service.list_files(max_results=10)
+    assert error is None
+    assert files[0]["name"] == TEST_FILE["name"]
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from app.agent_store import AgentStore
+from app.agent_writer import AgentWriter
+from app.engine import agent_engine
+from app.models import Agent, AgentStatus
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    store = AgentStore(f"sqlite:///{tmp_path / 'agents.db'}")
+    monkeypatch.setattr(agent_engine, "store", store)
+    monkeypatch.setattr(agent_engine, "_writer", AgentWriter(store, batch_size=10))
+    monkeypatch.setattr(agent_engine, "_agent_cache", {})
+    monkeypatch.setattr(agent_engine, "_agent_cache_complete", True)
+    return agent_engine
+
+def test_writes_racing_a_delete_do_not_recache_the_agent(engine):
+    agent = engine.create_agent(Agent(name="a", description="d", prompt="p", tools=[]))
+    agent_id = str(agent.id)
+    # The agent is read before the delete lands, as a background history save would
+    cached = engine.get_agent(agent_id)
+    engine.store.delete(agent_id)
+
+    cached.status = AgentStatus.RUNNING
+    assert not engine._patch_record(cached, {"status": AgentStatus.RUNNING.value})
+    assert engine.get_agent(agent_id) is None
+    assert agent_id not in [str(a.id) for a in engine.get_agents()]
+    assert engine.update_context(agent_id, {"chat_history": []}) is None
+    assert engine.transition_status(agent_id, AgentStatus.PAUSED) is None
+    assert engine.update_agent(agent_id, {"name": "b"}) is None
+
+def test_concurrent_turn_appends_are_not_lost(engine):
+    agent = engine.create_agent(Agent(name="a", description="d", prompt="p", tools=[]))
+    agent_id = str(agent.id)
+
+    threads = [threading.Thread(target=engine._append_chat_turn, args=(agent_id, f"m{i}", "r")) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    history = engine.get_agent(agent_id).context["chat_history"]
+    assert sorted(m["content"] for m in history if m["role"] == "user") == [f"m{i}" for i in range(8)]
@@ -0,0 +1,32 @@
+import json
+import pickle
+
+from google.oauth2.credentials import Credentials
+
+from app.google_token import delete_token, load_token, token_exists, token_path
+
+def make_credentials():
+    return Credentials(token="access", refresh_token="refresh", client_id="id", client_secret="secret",
+                       token_uri="https://oauth2.googleapis.com/token", scopes=["https://www.googleapis.com/auth/drive"])
+
+def test_legacy_pickle_is_converted_to_json(tmp_path):
+    credentials_path = str(tmp_path / "google_credentials.json")
+    (tmp_path / "token.pickle").write_bytes(pickle.dumps(make_credentials()))
+
+    assert token_exists(credentials_path)
+    creds = load_token(credentials_path)
+
+    assert creds.refresh_token == "refresh"
+    assert json.loads((tmp_path / "token.json").read_text())["refresh_token"] == "refresh"
+    assert load_token(credentials_path).scopes == ["https://www.googleapis.com/auth/drive"]
+
+def test_delete_removes_both_formats(tmp_path):
+    credentials_path = str(tmp_path / "google_credentials.json")
+    (tmp_path / "token.pickle").write_bytes(pickle.dumps(make_credentials()))
+    load_token(credentials_path)
+
+    delete_token(credentials_path)
+
+    assert not token_exists(credentials_path)
+    assert load_token(credentials_path) is None
+    assert token_path(credentials_path) == str(tmp_path / "token.json")
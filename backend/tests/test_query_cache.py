@@ -0,0 +1,49 @@
+from app.query_cache import QueryCache
+
+def test_get_put_counts_hits_and_misses():
+    cache = QueryCache(max_size=10, ttl_seconds=60)
+    key = QueryCache.make_key("docs", "search", "hello", 4)
+
+    assert cache.get(key) is None
+    cache.put(key, ["result"])
+    assert cache.get(key) == ["result"]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_keys_differ_by_kind_and_k():
+    assert QueryCache.make_key("docs", "search", "q", 4) != QueryCache.make_key("docs", "search", "q", 5)
+    assert QueryCache.make_key("docs", "search", "q", 4) != QueryCache.make_key("docs", "search_with_score", "q", 4)
+
+def test_expired_entries_are_misses():
+    cache = QueryCache(max_size=10, ttl_seconds=0)
+    key = QueryCache.make_key("docs", "search", "hello", 4)
+    cache.put(key, ["result"])
+
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_size=2, ttl_seconds=60)
+    first, second, third = (QueryCache.make_key("docs", "search", q, 4) for q in ("a", "b", "c"))
+    cache.put(first, 1)
+    cache.put(second, 2)
+    cache.get(first)
+    cache.put(third, 3)
+
+    assert cache.get(second) is None
+    assert cache.get(first) == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidate_only_drops_the_given_collection():
+    cache = QueryCache(max_size=10, ttl_seconds=60)
+    docs_key = QueryCache.make_key("docs", "search", "q", 4)
+    other_key = QueryCache.make_key("other", "search", "q", 4)
+    cache.put(docs_key, 1)
+    cache.put(other_key, 2)
+
+    cache.invalidate("docs")
+    assert cache.get(docs_key) is None
+    assert cache.get(other_key) == 2